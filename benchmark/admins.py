@@ -0,0 +1,17 @@
+"""
+Admins shared by the benchmarks.
+"""
+
+class WideAdmin(object):
+    """
+    Admin of a table with many columns, providing what is needed to
+    construct a :class:`camelot.view.action_steps.crud.SetColumns` step.
+
+    :param field_names: the names of the columns
+    """
+
+    def __init__(self, field_names):
+        self.field_names = field_names
+
+    def get_columns(self):
+        return self.field_names
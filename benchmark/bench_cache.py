@@ -0,0 +1,37 @@
+"""
+Benchmarks of the value cache of a table, while scrolling through a
+collection larger than the cache.
+"""
+
+import pytest
+
+from camelot.core.cache import ValueCache
+
+COLUMNS = 30
+
+class Entity(object):
+    pass
+
+def row_values(row, version):
+    return {column: 'value {} {} {}'.format(row, column, version) for column in range(COLUMNS)}
+
+@pytest.mark.benchmark(group='cache')
+@pytest.mark.parametrize('max_entries', [100, 1000])
+def bench_add_data(benchmark, max_entries):
+    entities = [Entity() for _ in range(2 * max_entries)]
+    # the first pass adds new rows, the second pass evicts them, the last
+    # pass updates the rows that are still cached with partly changed values
+    passes = [
+        [(row, entity, row_values(row, 0)) for row, entity in enumerate(entities)],
+        [(row, entity, row_values(row, 0)) for row, entity in enumerate(entities)],
+        [(row, entity, {**row_values(row, 0), 0: 'changed'}) for row, entity in enumerate(entities)],
+    ]
+
+    def churn():
+        cache = ValueCache(max_entries)
+        for values in passes:
+            for row, entity, row_data in values:
+                cache.add_data(row, entity, dict(row_data))
+        return cache
+
+    benchmark(churn)
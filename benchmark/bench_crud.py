@@ -0,0 +1,62 @@
+"""
+Benchmarks of the creation of the column definitions of a wide table.
+"""
+
+import pytest
+
+from camelot.view.action_steps.crud import SetColumns
+from camelot.view.controls import DelegateType
+
+from admins import WideAdmin
+
+COLUMNS = 500
+
+def delegate(delegate_type):
+    return type(delegate_type.name.capitalize(), (object,), {
+        'delegate_type': delegate_type,
+        'get_choices_data': classmethod(lambda cls, choices: [{'value': v, 'verbose_name': n} for v, n in choices]),
+    })
+
+class Types(object):
+
+    @staticmethod
+    def get_choices():
+        return [(i, 'choice {}'.format(i)) for i in range(10)]
+
+delegates = [delegate(delegate_type) for delegate_type in (
+    DelegateType.PLAIN_TEXT, DelegateType.INTEGER, DelegateType.FLOAT,
+    DelegateType.DATE, DelegateType.MANY2ONE, DelegateType.ENUM,
+    DelegateType.TEXT_EDIT, DelegateType.MONTHS, DelegateType.BOOL,
+)]
+
+def static_field_attributes(columns):
+    return [{
+        'field_name': 'field_{}'.format(i),
+        'name': 'Field {}'.format(i),
+        'column_width': 20,
+        'delegate': delegates[i % len(delegates)],
+        'types': Types,
+        'length': 40,
+        'editable': True,
+        'nullable': True,
+        'decimal': 2,
+        'minimum': 0,
+        'maximum': 100,
+        'action_routes': [],
+    } for i in range(columns)]
+
+@pytest.mark.benchmark(group='set_columns')
+def bench_get_delegate_state(benchmark):
+    attributes = static_field_attributes(COLUMNS)
+    step = SetColumns(WideAdmin([]), [])
+
+    def delegate_states():
+        return [step.get_delegate_state(fa) for fa in attributes]
+
+    benchmark(delegate_states)
+
+@pytest.mark.benchmark(group='set_columns')
+def bench_set_columns_mixed_delegates(benchmark):
+    attributes = static_field_attributes(COLUMNS)
+    admin = WideAdmin([fa['field_name'] for fa in attributes])
+    benchmark(SetColumns, admin, attributes)
@@ -0,0 +1,48 @@
+"""
+Benchmarks of the memory used by the data of a typical table page, with the
+slotted dataclasses compared to equivalent dataclasses with an instance
+dictionary.  The bytes per row are stored in the extra info of the results,
+use `--benchmark-json` to see them.
+"""
+
+import tracemalloc
+
+import pytest
+
+from camelot.core.qt import Qt
+from camelot.view.crud_action import DataCell, DataRowHeader, invalid_item
+from test import unslotted
+
+ROWS, COLUMNS = 500, 30
+
+def table_page(cell_cls, header_cls):
+    page = []
+    for row in range(ROWS):
+        cells = []
+        for column in range(COLUMNS):
+            roles = dict(invalid_item.roles)
+            roles[Qt.ItemDataRole.DisplayRole] = 'value'
+            cells.append(cell_cls(row=row, column=column, flags=invalid_item.flags, roles=roles))
+        page.append((header_cls(row=row, verbose_identifier='row'), cells))
+    return page
+
+def bytes_per_row(cell_cls, header_cls):
+    tracemalloc.start()
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        page = table_page(cell_cls, header_cls)
+        allocated = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(snapshot, 'filename'))
+    finally:
+        tracemalloc.stop()
+    del page
+    return allocated // ROWS
+
+@pytest.mark.benchmark(group='table_page')
+@pytest.mark.parametrize('slotted', [True, False], ids=['slotted', 'unslotted'])
+def bench_table_page(benchmark, slotted):
+    if slotted:
+        cell_cls, header_cls = DataCell, DataRowHeader
+    else:
+        cell_cls, header_cls = unslotted(DataCell), unslotted(DataRowHeader)
+    benchmark.extra_info['bytes_per_row'] = bytes_per_row(cell_cls, header_cls)
+    benchmark(table_page, cell_cls, header_cls)
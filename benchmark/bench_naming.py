@@ -0,0 +1,164 @@
+"""
+Benchmarks of binding, resolving and unbinding names through the initial
+naming context, as done for each lease, run and action route.
+"""
+
+import collections
+import threading
+import time
+
+import pytest
+
+from camelot.core.naming import BindingType, initial_naming_context
+
+NAMES = 1000
+
+class Leased(object):
+    pass
+
+@pytest.mark.benchmark(group='naming')
+def bench_bind_resolve_unbind(benchmark, naming_context):
+    leases = naming_context.bind_new_context('leases')
+    prefix = initial_naming_context.get_qual_name(naming_context.get_qual_name('leases'))
+    objects = [Leased() for _ in range(NAMES)]
+
+    def cycle():
+        names = [initial_naming_context.bind(prefix + (str(i),), obj) for i, obj in enumerate(objects)]
+        for name in names:
+            initial_naming_context.resolve(name)
+        for name in names:
+            initial_naming_context.unbind(name)
+
+    benchmark(cycle)
+    assert len(leases) == 0
+
+@pytest.mark.benchmark(group='naming')
+def bench_bind_resolve_unbind_many(benchmark, naming_context):
+    leases = naming_context.bind_new_context('leases')
+    prefix = initial_naming_context.get_qual_name(naming_context.get_qual_name('leases'))
+    objects = [Leased() for _ in range(NAMES)]
+
+    def cycle():
+        names = [initial_naming_context.bind(prefix + (str(i),), obj) for i, obj in enumerate(objects)]
+        initial_naming_context.resolve_many(names)
+        initial_naming_context.unbind_many(names)
+
+    benchmark(cycle)
+    assert len(leases) == 0
+
+@pytest.mark.benchmark(group='naming')
+def bench_resolve_constants(benchmark):
+    names = [initial_naming_context._bind_object(i) for i in range(NAMES)]
+    names.extend(initial_naming_context._bind_object('value {}'.format(i)) for i in range(NAMES))
+
+    def resolve():
+        for name in names:
+            initial_naming_context.resolve(name)
+
+    benchmark(resolve)
+
+@pytest.mark.benchmark(group='naming')
+def bench_resolve_routes(benchmark, naming_context):
+    actions = naming_context.bind_new_context('admin').bind_new_context('list').bind_new_context('actions')
+    names = [actions.bind(str(i), Leased()) for i in range(NAMES)]
+
+    def resolve():
+        for name in names:
+            initial_naming_context.resolve(name)
+
+    benchmark(resolve)
+
+@pytest.mark.benchmark(group='naming')
+def bench_bind_constants(benchmark):
+    values = list(range(NAMES))
+    values.extend('value {}'.format(i) for i in range(NAMES))
+
+    def bind():
+        for value in values:
+            initial_naming_context._bind_object(value)
+
+    benchmark(bind)
+
+class TimedLock(object):
+    """
+    Wraps a lock to measure how often and how long each thread waits to
+    acquire it.
+    """
+
+    def __init__(self, lock):
+        self._lock = lock
+        # thread name mapped to the number of acquisitions and the seconds waited
+        self.acquired = collections.Counter()
+        self.waited = collections.Counter()
+
+    def acquire(self, blocking=True, timeout=-1):
+        started = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        thread_name = threading.current_thread().name
+        self.waited[thread_name] += time.perf_counter() - started
+        self.acquired[thread_name] += 1
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+@pytest.mark.benchmark(group='naming-contention')
+@pytest.mark.parametrize('readers', [1, 4])
+def bench_concurrent_resolve(benchmark, naming_context, readers):
+    # long lived reader threads resolve all names in each round, while a writer
+    # binds, rebinds and unbinds in the same context.  the time per round should
+    # grow linearly with the number of readers, as readers do not take the lock
+    # of the bindings, the time the writer waits for it is stored in the extra info.
+    actions = naming_context.bind_new_context('actions')
+    names = [tuple(actions.bind(str(i), Leased())) for i in range(NAMES)]
+    storage = actions._bindings[BindingType.named_object]
+    timed_lock = storage._lock = TimedLock(storage._lock)
+    started, finished = threading.Barrier(readers + 1), threading.Barrier(readers + 1)
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while True:
+            started.wait()
+            if stop.is_set():
+                return
+            try:
+                for name in names:
+                    initial_naming_context.resolve(name)
+            except Exception as e:
+                errors.append(e)
+            finished.wait()
+
+    def write():
+        while not stop.is_set():
+            name = actions.bind('written', Leased())
+            actions.rebind('0', Leased())
+            initial_naming_context.unbind(name)
+
+    threads = [threading.Thread(target=read, name='reader-{}'.format(i)) for i in range(readers)]
+    threads.append(threading.Thread(target=write, name='writer'))
+    for thread in threads:
+        thread.start()
+
+    def cycle():
+        started.wait()
+        finished.wait()
+
+    try:
+        benchmark(cycle)
+    finally:
+        stop.set()
+        started.wait()
+        for thread in threads:
+            thread.join()
+    assert not errors
+    assert not [name for name in timed_lock.acquired if name.startswith('reader')]
+    benchmark.extra_info['writer_lock_acquisitions'] = timed_lock.acquired['writer']
+    benchmark.extra_info['writer_lock_wait_seconds'] = timed_lock.waited['writer']
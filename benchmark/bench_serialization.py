@@ -0,0 +1,74 @@
+"""
+Benchmarks of the encoding of large action steps with each of the available
+json codecs and wire formats.
+"""
+
+import copy
+
+import pytest
+
+from camelot.core import codec
+from camelot.core.qt import Qt
+from camelot.view.action_steps.crud import SetColumns, Update
+from camelot.view.controls import DelegateType
+from camelot.view.crud_action import DataRowHeader, invalid_item
+
+from admins import WideAdmin
+
+available_codecs = [c.name for c in codec.json_codecs if c.available()]
+available_wire_formats = codec.get_wire_formats()
+
+class PlainTextDelegate(object):
+
+    delegate_type = DelegateType.PLAIN_TEXT
+
+def update_payload(rows, columns):
+    changed_ranges = []
+    for row in range(rows):
+        cells = []
+        for column in range(columns):
+            cell = copy.deepcopy(invalid_item)
+            cell.row, cell.column = row, column
+            cell.flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+            cell.roles[Qt.ItemDataRole.DisplayRole] = 'value {} {}'.format(row, column)
+            cell.roles[Qt.ItemDataRole.EditRole] = ('constant', 'int', str(row * column))
+            cells.append(cell)
+        changed_ranges.append((row, DataRowHeader(row=row, verbose_identifier=str(row)), cells))
+    return Update(changed_ranges)
+
+def set_columns_payload(columns):
+    admin = WideAdmin(['field_{}'.format(i) for i in range(columns)])
+    static_field_attributes = [{
+        'field_name': field_name,
+        'name': field_name.capitalize(),
+        'column_width': 20,
+        'delegate': PlainTextDelegate,
+        'length': 40,
+        'editable': True,
+        'action_routes': [],
+    } for field_name in admin.field_names]
+    return SetColumns(admin, static_field_attributes)
+
+@pytest.fixture(params=available_codecs)
+def json_codec(request):
+    previous = codec.get_json_codec()
+    yield codec.set_json_codec(request.param)
+    codec._json_codec = previous
+
+@pytest.mark.benchmark(group='update')
+def bench_update(benchmark, json_codec):
+    step = update_payload(500, 30)
+    benchmark(step._to_bytes)
+
+@pytest.mark.benchmark(group='set_columns')
+def bench_set_columns(benchmark, json_codec):
+    step = set_columns_payload(500)
+    benchmark(step._to_bytes)
+
+@pytest.mark.benchmark(group='wire_format')
+@pytest.mark.parametrize('wire_format', available_wire_formats)
+def bench_update_wire_format(benchmark, wire_format):
+    step = update_payload(500, 30)
+    wire_codec = codec.get_codec(wire_format)
+    benchmark.extra_info['bytes'] = len(step._to_bytes(wire_codec))
+    benchmark(step._to_bytes, wire_codec)
@@ -0,0 +1,28 @@
+"""
+Benchmarks of checking in files into the storage, the throughput in bytes
+per second is stored in the extra info of the results.
+"""
+
+import io
+from pathlib import PurePath
+
+import pytest
+
+from camelot.core.files.storage import Storage
+
+ROUNDS = 50
+
+@pytest.mark.benchmark(group='storage')
+@pytest.mark.parametrize('size', [4 * 1024, 1024 * 1024])
+def bench_checkin_stream(benchmark, media_root, size):
+    storage = Storage(PurePath('benchmark'))
+    data = bytes(range(256)) * (size // 256)
+
+    def checkin():
+        return storage.checkin_stream('document', '.bin', io.BytesIO(data))
+
+    stored_file = benchmark.pedantic(checkin, rounds=ROUNDS)
+    assert storage.exists(stored_file.name)
+    # no statistics are collected when benchmarks are disabled
+    if benchmark.stats is not None:
+        benchmark.extra_info['bytes_per_second'] = size / benchmark.stats.stats.mean
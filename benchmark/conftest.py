@@ -0,0 +1,39 @@
+"""
+Fixtures shared by the benchmarks.  The benchmarks run headless, without a
+client or the C++ backend, use `invoke benchmark` or run pytest in this
+directory with `QT_QPA_PLATFORM=offscreen`.
+"""
+
+import itertools
+
+import pytest
+
+from camelot.core.conf import settings
+from camelot.core.naming import initial_naming_context
+
+_context_counter = itertools.count()
+
+class MediaSettings(object):
+
+    def __init__(self, media_root):
+        self.CAMELOT_MEDIA_ROOT = media_root
+
+@pytest.fixture
+def media_root(tmp_path):
+    """
+    A temporary directory used as `CAMELOT_MEDIA_ROOT` during the benchmark.
+    """
+    target = MediaSettings(str(tmp_path))
+    settings.insert(0, target)
+    yield tmp_path
+    settings.remove(target)
+
+@pytest.fixture
+def naming_context():
+    """
+    A new context bound in the initial naming context during the benchmark.
+    """
+    name = 'benchmark_{}'.format(next(_context_counter))
+    context = initial_naming_context.bind_new_context(name)
+    yield context
+    initial_naming_context.unbind_context(name)
@@ -28,7 +28,7 @@
 #  ============================================================================
 import itertools
 
-from camelot.core.naming import initial_naming_context
+from camelot.core.naming import initial_naming_context, EvictingNamingContext
 from camelot.admin.action.base import ModelContext
 
 """ModelContext and Actions that run in the context of an 
@@ -36,7 +36,8 @@ application.
 """
 
 model_context_counter = itertools.count(1)
-model_context_naming = initial_naming_context.bind_new_context('model_context')
+model_context_naming = EvictingNamingContext()
+initial_naming_context.bind_context('model_context', model_context_naming)
 
 class ApplicationActionModelContext(ModelContext):
     """The Model context for an :class:`camelot.admin.action.Action`.  On top 
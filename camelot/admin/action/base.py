@@ -53,7 +53,7 @@ reference to database sessions or other model related data.
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Mode(DataclassSerializable):
     """A mode is a way in which an action can be triggered, a print action could
 be triggered as 'Export to PDF' or 'Export to Word'.  None always represents
@@ -112,7 +112,7 @@ the default mode.
             action.setIconVisibleInMenu(False)
             return action
 
-@dataclass
+@dataclass(slots=True)
 class State(DataclassSerializable):
     """A state represents the appearance and behavior of the widget that
 triggers the action.  When the objects in the model change, the 
@@ -12,7 +12,7 @@ LOGGER = logging.getLogger(__name__)
 Route = typing.Tuple[str, ...]
 
 
-@dataclass
+@dataclass(slots=True)
 class RouteWithRenderHint(DataclassSerializable):
     """
     A :class:`camelot.admin.admin_route.Route` with associated :class:`camelot.admin.action.base.RenderHint`.
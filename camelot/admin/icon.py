@@ -31,7 +31,7 @@ class Icon(DataclassSerializable):
 
 # @tbd : correct location of this class in the source code
 
-@dataclass
+@dataclass(slots=True)
 class CompletionValue(DataclassSerializable):
     """
     Represent one of the autocompletion values.
@@ -1,9 +1,20 @@
+import contextlib
+import heapq
+import itertools
 import logging
-import json
+import threading
+import time
 
 from camelot.core.qt import QtWidgets, QtCore
-from ..view.requests import AbstractRequest
-from ..view.responses import Busy
+from .codec import get_codec, get_json_codec
+from .conf import settings
+from .metrics import PrometheusFileExporter, metrics
+from .naming import NamingSnapshots, initial_naming_context
+from .recording import Recorder
+from .scheduler import Scheduler
+from .serializable import NamedDataclassSerializable
+from ..view.requests import AbstractRequest, ResponseCollector, cancel_requests
+from ..view.responses import Busy, ResponseFrame
 from .singleton import QSingleton
 
 LOGGER = logging.getLogger(__name__)
@@ -43,7 +54,118 @@ def is_cpp_gui_context_name(gui_context_name):
 
 def cpp_action_step(gui_context_name, name, step=QtCore.QByteArray()):
     response = get_root_backend().action_step(gui_context_name, name, step)
-    return json.loads(response.data())
+    return get_json_codec().decode(response.data())
+
+
+class BusyTimer(object):
+    """
+    Calls :meth:`ResponseBuffer.on_threshold` of each buffer once its
+    threshold has passed, from a single thread, to not start a thread for
+    each request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Condition()
+        # heap of (deadline, counter, buffer) tuples
+        self._deadlines = []
+        self._counter = itertools.count()
+        self._thread = None
+
+    def schedule(self, response_buffer, delay):
+        with self._lock:
+            heapq.heappush(self._deadlines, (
+                time.monotonic() + delay, next(self._counter), response_buffer
+            ))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name='camelot-busy-timer'
+                )
+                self._thread.start()
+            self._lock.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while True:
+                    if not len(self._deadlines):
+                        self._lock.wait()
+                        continue
+                    delay = self._deadlines[0][0] - time.monotonic()
+                    if delay <= 0:
+                        response_buffer = heapq.heappop(self._deadlines)[-1]
+                        break
+                    self._lock.wait(delay)
+            try:
+                response_buffer.on_threshold()
+            except Exception as e:
+                LOGGER.error('Unhandled exception signaling busy model', exc_info=e)
+
+busy_timer = BusyTimer()
+
+
+class ResponseBuffer(ResponseCollector):
+    """
+    Collects the responses produced while handling a request, to send them
+    as a single message when the request is handled.  Once the request takes
+    longer than the threshold, :class:`camelot.view.responses.Busy` is sent,
+    followed by the collected responses, and subsequent responses are sent
+    immediately.  This happens when the threshold passes, even if the
+    request produces no responses in the meantime.
+
+    :param threshold: the time in seconds before the client is informed the
+        model is busy
+    :param labels: the metric labels of the request, with which responses
+        are sent when the threshold passes, `None` if there are no labels
+    """
+
+    def __init__(self, response_handler, threshold, labels=None):
+        super().__init__(response_handler)
+        self.threshold = threshold
+        self.labels = labels
+        self.busy = False
+        self._closed = False
+        self._lock = threading.RLock()
+        busy_timer.schedule(self, threshold)
+
+    def labelled(self):
+        """
+        :return: a context manager setting the metric labels of the request
+        """
+        if self.labels is None:
+            return contextlib.nullcontext()
+        return metrics.labels(*self.labels)
+
+    def on_threshold(self):
+        """
+        Inform the client the model is busy and send the collected responses,
+        unless the buffer was closed.
+        """
+        with self._lock, self.labelled():
+            if self.busy or self._closed:
+                return
+            self.busy = True
+            self.response_handler.send_response(Busy(True))
+            self.flush()
+
+    def send_response(self, response):
+        with self._lock:
+            if self.busy:
+                self.response_handler.send_response(response)
+            else:
+                super().send_response(response)
+
+    def flush(self):
+        with self._lock:
+            super().flush()
+
+    def close(self):
+        """
+        Send the collected responses, after which the client is no longer
+        informed the model is busy when the threshold passes.
+        """
+        with self._lock:
+            self._closed = True
+            self.flush()
 
 
 class PythonConnection(QtCore.QObject, metaclass=QSingleton):
@@ -52,10 +174,110 @@ class PythonConnection(QtCore.QObject, metaclass=QSingleton):
     and the dgc.  As any instance of this class listens to requests for the
     server, only one instance of this class should exist, to avoid sending
     multiple responses for the same request to the client.
+
+    .. attribute:: wire_format
+
+        the format in which requests and responses are encoded, json by
+        default.  The client can change it with a
+        :class:`camelot.view.requests.SetWireFormat` request.
+
+    .. attribute:: frame_size
+
+        when not `None`, responses larger than this size are streamed to the
+        client in multiple :class:`camelot.view.responses.ResponseFrame`
+        responses.  The client can change it with a
+        :class:`camelot.view.requests.SetFrameSize` request.
+
+    .. attribute:: busy_threshold
+
+        when `None`, :class:`camelot.view.responses.Busy` is sent before and
+        after each request.  Otherwise the time in seconds a request can take
+        before the client is informed the model is busy, the responses of
+        requests handled within this time are sent as a single message.
+        Defaults to the `CAMELOT_BUSY_THRESHOLD` setting.
+
+    .. attribute:: scheduler
+
+        when not `None`, the :class:`camelot.core.scheduler.Scheduler` that
+        executes requests with a strand in worker threads, in the lane of the
+        request, see :meth:`camelot.view.requests.AbstractRequest.get_strand`
+        and :meth:`camelot.view.requests.AbstractRequest.get_lane`.  The
+        number of worker threads is set with the `CAMELOT_MODEL_WORKERS`
+        setting, by default all requests are executed in the thread
+        receiving them.  Requests on different strands, such as the runs
+        of actions on different views, are executed at the same time, so
+        with multiple workers the model contexts of different views should
+        not share objects that are not thread safe.  In particular each view
+        should query its objects in its own SQLAlchemy session.
+
+    When the `CAMELOT_METRICS_FILE` setting is present, the timings and sizes
+    of requests and responses are dumped to this file in the Prometheus text
+    format, every `CAMELOT_METRICS_INTERVAL` seconds, see
+    :mod:`camelot.core.metrics`.
+
+    .. attribute:: recorder
+
+        when not `None`, the :class:`camelot.core.recording.Recorder` that
+        records all requests and responses, to be replayed with
+        :func:`camelot.core.recording.replay`.  Recording starts when the
+        `CAMELOT_RECORDING_FILE` setting is present.
+
+    When the `CAMELOT_LEASE_TTL` setting is present, objects leased to the
+    client are released when the client did not unbind them within this
+    number of seconds.  When the `CAMELOT_MAX_LEASES` setting is present,
+    the oldest leases are released when there are more leases, see
+    :class:`camelot.core.naming.LeaseNamingContext`.  By default leases are
+    kept until the client unbinds them.
+
+    At most `CAMELOT_MAX_MODEL_CONTEXTS` model contexts are kept for the
+    client, the least recently used are evicted first, as well as those not
+    used for `CAMELOT_MODEL_CONTEXT_MAX_IDLE` seconds, see
+    :class:`camelot.core.naming.EvictingNamingContext`.
+
+    When the `CAMELOT_NAMING_SNAPSHOT_FILE` setting is present, the number of
+    bindings and the size of the objects in each naming context are appended
+    to this file every `CAMELOT_NAMING_SNAPSHOT_INTERVAL` seconds, see
+    :class:`camelot.core.naming.NamingSnapshots`.
     """
 
+    # emitted with an encoded message, to post it to the client from the
+    # thread of the connection
+    message_ready = QtCore.qt_signal(object)
+
     def __init__(self):
         super().__init__()
+        self.wire_format = 'json'
+        self.frame_size = None
+        self.busy_threshold = settings.get('CAMELOT_BUSY_THRESHOLD', None)
+        self.scheduler = None
+        model_workers = settings.get('CAMELOT_MODEL_WORKERS', None)
+        if model_workers:
+            self.scheduler = Scheduler(model_workers)
+        self.recorder = None
+        recording_file = settings.get('CAMELOT_RECORDING_FILE', None)
+        if recording_file is not None:
+            self.recorder = Recorder(recording_file)
+        metrics_file = settings.get('CAMELOT_METRICS_FILE', None)
+        if metrics_file is not None:
+            metrics.add_exporter(PrometheusFileExporter(
+                metrics_file, settings.get('CAMELOT_METRICS_INTERVAL', 60)
+            ))
+        initial_naming_context.resolve_context('leases').configure(
+            settings.get('CAMELOT_LEASE_TTL', None),
+            settings.get('CAMELOT_MAX_LEASES', None),
+        )
+        snapshot_file = settings.get('CAMELOT_NAMING_SNAPSHOT_FILE', None)
+        if snapshot_file is not None:
+            NamingSnapshots(
+                snapshot_file, settings.get('CAMELOT_NAMING_SNAPSHOT_INTERVAL', 60)
+            ).start()
+        from ..admin.action.application_action import model_context_naming
+        model_context_naming.configure(
+            settings.get('CAMELOT_MAX_MODEL_CONTEXTS', 1000),
+            settings.get('CAMELOT_MODEL_CONTEXT_MAX_IDLE', None),
+        )
+        self._stream_counter = itertools.count()
+        self.message_ready.connect(self._post_message)
         backend = get_root_backend()
         dgc = backend.distributed_garbage_collector()
         dgc.request.connect(self.on_request)
@@ -66,11 +288,62 @@ class PythonConnection(QtCore.QObject, metaclass=QSingleton):
     @classmethod
     def _execute_serialized_request(cls, serialized_request, response_handler):
         try:
-            response_handler.send_response(Busy(True))
-            AbstractRequest.handle_request(
-                serialized_request, response_handler, response_handler
+            request_type_name, request_data = AbstractRequest.decode_request(
+                serialized_request, get_codec(response_handler.wire_format)
             )
-            response_handler.send_response(Busy(False))
+            scheduler = getattr(response_handler, 'scheduler', None)
+            if scheduler is None:
+                cls._execute_request(request_type_name, request_data, response_handler)
+                return
+            request_type = NamedDataclassSerializable.get_cls_by_name(
+                request_type_name
+            )
+            parts = request_type.split(request_data)
+        except Exception as e:
+            LOGGER.error('Unhandled exception in model process', exc_info=e)
+            return
+        for part in parts:
+            try:
+                strand = request_type.get_strand(part)
+                if strand is not None:
+                    scheduler.submit(
+                        strand, cls._execute_request, request_type_name,
+                        part, response_handler,
+                        lane=request_type.get_lane(part)
+                    )
+                    continue
+            except Exception as e:
+                LOGGER.error('Unhandled exception in model process', exc_info=e)
+                continue
+            cls._execute_request(request_type_name, part, response_handler)
+
+    @classmethod
+    def _execute_request(cls, request_type_name, request_data, response_handler):
+        try:
+            threshold = getattr(response_handler, 'busy_threshold', None)
+            if threshold is None:
+                response_handler.send_response(Busy(True))
+                AbstractRequest.dispatch_request(
+                    request_type_name, request_data, response_handler, response_handler
+                )
+                response_handler.send_response(Busy(False))
+            else:
+                # the collected responses are flushed with the labels of the
+                # request, for them to be observed with these labels
+                labels = None
+                if metrics.exporters:
+                    request_type = NamedDataclassSerializable.get_cls_by_name(request_type_name)
+                    labels = (request_type_name, request_type.get_route(request_data))
+                response_buffer = ResponseBuffer(response_handler, threshold, labels)
+                with response_buffer.labelled():
+                    try:
+                        AbstractRequest.dispatch_request(
+                            request_type_name, request_data, response_buffer, response_handler
+                        )
+                    finally:
+                        response_buffer.close()
+                        if response_buffer.busy:
+                            response_handler.send_response(Busy(False))
         except Exception as e:
             LOGGER.error('Unhandled exception in model process', exc_info=e)
             import traceback
@@ -83,17 +356,68 @@ class PythonConnection(QtCore.QObject, metaclass=QSingleton):
 
     @QtCore.qt_slot(QtCore.QByteArray)
     def on_request(self, request):
-        self._execute_serialized_request(request.data(), self)
+        data = request.data()
+        if self.recorder is not None:
+            self.recorder.record_request(data)
+        self._execute_serialized_request(data, self)
 
-    @classmethod
-    def send_response(cls, response):
-        backend = get_root_backend()
-        action_runner = backend.action_runner()
-        action_runner.onResponse(QtCore.QByteArray(response._to_bytes()))
+    def send_response(self, response):
+        """
+        Encode the response and post it to the client.  This method can be
+        called from any thread, the encoded messages are posted from the
+        thread of the connection, in the order in which they were encoded.
+        When the response is sent in frames, each frame is posted as soon as
+        it is encoded, to not keep the complete encoded response in memory.
+        Frames of responses sent from different threads can be interleaved,
+        the client joins them by stream, see
+        :class:`camelot.view.responses.ResponseFrame` for the format of a
+        frame.
+        """
+        serialize_seconds, response_bytes = 0, 0
+        started = time.perf_counter()
+        for message in self._encode_response(response):
+            serialize_seconds += time.perf_counter() - started
+            response_bytes += len(message)
+            if self.recorder is not None:
+                self.recorder.record_response(message, self.wire_format)
+            self.message_ready.emit(message)
+            started = time.perf_counter()
+        if metrics.exporters:
+            metrics.observe('camelot_response_serialize_seconds', serialize_seconds)
+            metrics.observe('camelot_response_bytes', response_bytes)
+
+    def _encode_response(self, response):
+        codec = get_codec(self.wire_format)
+        if self.frame_size is None:
+            yield response._to_bytes(codec)
+            return
+        frames = response.iter_frames(self.frame_size, codec)
+        frame = next(frames)
+        next_frame = next(frames, None)
+        if next_frame is None:
+            # the response fits in a single frame
+            yield frame
+            return
+        stream = next(self._stream_counter)
+        for index in itertools.count():
+            last = (next_frame is None)
+            response_frame = ResponseFrame(stream=stream, index=index, last=last, data=frame)
+            yield response_frame.to_message(codec)
+            if last:
+                break
+            frame, next_frame = next_frame, next(frames, None)
+
+    @QtCore.qt_slot(object)
+    def _post_message(self, message):
+        get_root_backend().action_runner().onResponse(QtCore.QByteArray(message))
 
     @classmethod
     def send_action_step(cls, gui_context_name, step):
         return cpp_action_step(gui_context_name, type(step).__name__, step._to_bytes())
 
-    def has_cancel_request(self):
-        return False
+    def has_cancel_request(self, run_name):
+        """
+        :return: `True` if a cancel was requested for the run, the request
+            is consumed.
+        """
+        return cancel_requests.pop(run_name)
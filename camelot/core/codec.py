@@ -0,0 +1,408 @@
+"""
+Codecs to encode and decode the messages exchanged between the model
+and the GUI.
+
+Json is the default wire format, encoded by default with the stdlib
+:mod:`json` module, which is always available.  When `orjson` or `msgspec`
+is installed, it can be chosen as json codec with the `CAMELOT_JSON_CODEC`
+setting, or at runtime through :func:`set_json_codec`.  These codecs
+produce the same decoded messages as the stdlib codec, but without the
+whitespace between items.
+
+The binary wire formats `msgpack` and `cbor` are available when `msgpack`
+or `cbor2` is installed.  A connection can switch to such a format, see
+:func:`get_codec`.  Binary codecs encode the same values as the json codecs,
+except for dictionary keys, which are not converted to strings.
+
+Values the json backends do not support natively are converted by the
+encoder hooks, which can be extended with :func:`register_encoder_hook`.
+Serializable objects apply the hooks before encoding, so they take
+precedence over the types some codecs encode natively, such as enums and
+dates.
+"""
+
+import base64
+import datetime
+import importlib.util
+import json
+import logging
+from enum import Enum
+
+from .qt import QtCore, QtGui
+from .utils import ugettext_lazy
+
+LOGGER = logging.getLogger(__name__)
+
+encoder_hooks = dict()
+_resolved_hooks = dict()
+
+def register_encoder_hook(python_type, hook):
+    """
+    Register a function that converts objects of a type to a value that can
+    be encoded to json.  The hook is used for instances of the type and its
+    subclasses, unless a hook is registered for a more specific type.
+
+    :param python_type: the type of the objects to convert
+    :param hook: a function taking the object as its argument and returning
+        the value to encode instead
+    """
+    encoder_hooks[python_type] = hook
+    _resolved_hooks.clear()
+
+def get_encoder_hook(obj_type):
+    """
+    :return: the hook registered for the most specific type in the mro of
+        obj_type, or `None` if no hook is registered for it
+    """
+    hook = _resolved_hooks.get(obj_type)
+    if hook is None:
+        for cls in obj_type.__mro__:
+            hook = encoder_hooks.get(cls)
+            if hook is not None:
+                _resolved_hooks[obj_type] = hook
+                break
+    return hook
+
+def encoder_hook(obj):
+    """
+    Convert an object the json backends cannot encode natively, using the
+    hook registered for the most specific type of the object.
+
+    :raises: TypeError if no hook is registered for the type of the object
+    """
+    hook = get_encoder_hook(type(obj))
+    if hook is None:
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+    return hook(obj)
+
+def _encode_image(obj):
+    byte_array = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(byte_array)
+    buffer.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
+    obj.save(buffer, "PNG")
+    return base64.b64encode(byte_array).decode()
+
+def _refuse_date(obj):
+    raise TypeError("{} {} can not be serialized.".format(type(obj), obj))
+
+register_encoder_hook(ugettext_lazy, str)
+register_encoder_hook(QtGui.QKeySequence, lambda obj: obj.toString())
+register_encoder_hook(QtGui.QKeySequence.StandardKey, lambda obj: QtGui.QKeySequence(obj).toString())
+register_encoder_hook(Enum, lambda obj: obj.value)
+register_encoder_hook(QtCore.QJsonValue, lambda obj: obj.toVariant())
+register_encoder_hook(QtGui.QImage, _encode_image)
+register_encoder_hook(datetime.date, _refuse_date)
+
+
+class AbstractCodec(object):
+    """
+    Interface of a codec for a wire format.
+
+    .. attribute:: name
+
+        the name of the codec
+
+    .. attribute:: wire_format
+
+        the name of the format of the encoded messages
+    """
+
+    name = None
+    wire_format = None
+
+    @classmethod
+    def available(cls):
+        """
+        :return: `True` if the libraries needed by the codec are installed
+        """
+        raise NotImplementedError()
+
+    def encode(self, obj) -> bytes:
+        """
+        :return: the encoded obj as bytes
+        """
+        raise NotImplementedError()
+
+    def decode(self, data):
+        """
+        :param data: the encoded object
+        :return: the decoded python object
+        """
+        raise NotImplementedError()
+
+    def iterencode(self, obj):
+        """
+        Encode an object in parts, the concatenation of the parts is the
+        encoded object.  The default implementation encodes the object at
+        once, codecs able to produce the parts while encoding should
+        reimplement this method.
+
+        :return: a generator of `bytes` parts
+        """
+        yield self.encode(obj)
+
+
+class DataclassEncoder(json.JSONEncoder):
+    """
+    Stdlib json encoder that converts unsupported objects with the encoder
+    hooks.
+    """
+
+    def default(self, obj):
+        return encoder_hook(obj)
+
+
+# the encoder of the stdlib codec
+json_encoder = DataclassEncoder()
+
+
+class JsonCodec(AbstractCodec):
+    """
+    Codec using the stdlib :mod:`json` module.  This codec is always
+    available.
+
+    :param encoder: a :class:`json.JSONEncoder`, by default
+        :data:`json_encoder`, which converts unsupported objects with the
+        encoder hooks.
+    """
+
+    name = 'json'
+    wire_format = 'json'
+
+    def __init__(self, encoder=None):
+        self.encoder = encoder or json_encoder
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def encode(self, obj) -> bytes:
+        return self.encoder.encode(obj).encode()
+
+    def decode(self, data):
+        return json.loads(data)
+
+    def iterencode(self, obj):
+        for part in self.encoder.iterencode(obj):
+            yield part.encode()
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    Codec using `orjson`.  Dataclasses and dates are passed to the encoder
+    hooks, to encode them the same way as the stdlib codec.  Enums are
+    encoded natively, unless they were converted by the hooks beforehand.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+        self._option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec('orjson') is not None
+
+    def encode(self, obj) -> bytes:
+        return self._dumps(obj, default=encoder_hook, option=self._option)
+
+    def decode(self, data):
+        return self._loads(data)
+
+    # orjson can not encode incrementally, frames are sliced from the
+    # encoded object
+    iterencode = AbstractCodec.iterencode
+
+
+class MsgspecCodec(JsonCodec):
+    """
+    Codec using `msgspec`.  Notice that msgspec encodes enums, dataclasses
+    and dates natively, unless they were converted by the hooks beforehand.
+    Objects msgspec refuses, such as dictionaries with `None` or boolean
+    keys, are encoded by the stdlib codec.
+    """
+
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+        super().__init__()
+        self._encoder = msgspec.json.Encoder(enc_hook=encoder_hook)
+        self._decoder = msgspec.json.Decoder()
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec('msgspec') is not None
+
+    def encode(self, obj) -> bytes:
+        try:
+            return self._encoder.encode(obj)
+        except TypeError:
+            return super().encode(obj)
+
+    def decode(self, data):
+        return self._decoder.decode(data)
+
+    # msgspec can not encode incrementally, frames are sliced from the
+    # encoded object
+    iterencode = AbstractCodec.iterencode
+
+
+# in order of preference, the first available codec is the default
+json_codecs = [JsonCodec, OrjsonCodec, MsgspecCodec]
+
+_json_codec = None
+
+def set_json_codec(name=None):
+    """
+    Select the codec used to encode and decode json messages.
+
+    :param name: the name of the codec, `None` to use the setting
+        `CAMELOT_JSON_CODEC` if present, or otherwise the stdlib codec.
+
+    :return: the selected codec
+    """
+    global _json_codec
+    if name is None:
+        from .conf import settings
+        name = settings.get('CAMELOT_JSON_CODEC')
+    for codec_cls in json_codecs:
+        if name in (None, codec_cls.name) and codec_cls.available():
+            _json_codec = codec_cls()
+            LOGGER.debug('Using {} codec'.format(codec_cls.name))
+            return _json_codec
+    raise ValueError('Json codec {} is not available'.format(name))
+
+def get_json_codec():
+    """
+    :return: the codec used to encode and decode json messages
+    """
+    if _json_codec is None:
+        return set_json_codec()
+    return _json_codec
+
+
+class MsgpackCodec(AbstractCodec):
+    """
+    Codec using `msgpack` to encode to the MessagePack binary format.
+    """
+
+    name = 'msgpack'
+    wire_format = 'msgpack'
+
+    def __init__(self):
+        import msgpack
+        self._packer = msgpack.Packer(default=encoder_hook, use_bin_type=True)
+        self._unpackb = msgpack.unpackb
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec('msgpack') is not None
+
+    def encode(self, obj) -> bytes:
+        return self._packer.pack(obj)
+
+    def decode(self, data):
+        return self._unpackb(data, raw=False, strict_map_key=False)
+
+
+class CborCodec(AbstractCodec):
+    """
+    Codec using `cbor2` to encode to the CBOR binary format.  Notice that
+    cbor2 encodes dates natively, where the other codecs refuse them.
+    """
+
+    name = 'cbor'
+    wire_format = 'cbor'
+
+    def __init__(self):
+        import cbor2
+        self._dumps = cbor2.dumps
+        self._loads = cbor2.loads
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec('cbor2') is not None
+
+    @staticmethod
+    def _default(encoder, obj):
+        encoder.encode(encoder_hook(obj))
+
+    def encode(self, obj) -> bytes:
+        return self._dumps(obj, default=self._default)
+
+    def decode(self, data):
+        return self._loads(data)
+
+
+binary_codecs = [MsgpackCodec, CborCodec]
+
+_binary_codecs = dict()
+
+def get_wire_formats():
+    """
+    :return: a list with the names of the available wire formats, starting
+        with the default format
+    """
+    return [JsonCodec.wire_format] + [c.wire_format for c in binary_codecs if c.available()]
+
+def get_codec(wire_format=JsonCodec.wire_format):
+    """
+    :param wire_format: the name of a wire format, as returned by
+        :func:`get_wire_formats`
+    :return: the codec to use for the wire format
+    :raises: ValueError if the wire format is not available
+    """
+    if wire_format == JsonCodec.wire_format:
+        return get_json_codec()
+    codec = _binary_codecs.get(wire_format)
+    if codec is None:
+        for codec_cls in binary_codecs:
+            if codec_cls.wire_format == wire_format and codec_cls.available():
+                codec = _binary_codecs[wire_format] = codec_cls()
+                break
+        else:
+            raise ValueError('Wire format {} is not available'.format(wire_format))
+    return codec
+
+def decode_message(data, codec=None):
+    """
+    Decode a message that is either json or encoded by the codec.  Json
+    messages are always accepted, to be able to switch the wire format of
+    a connection without losing messages.
+
+    :param data: the encoded message, as `bytes` or `str`
+    :param codec: the codec of the connection, `None` for the json codec
+    """
+    if (codec is None) or isinstance(data, str) or (data[:1] in (b'[', b'{')):
+        return get_json_codec().decode(data)
+    return codec.decode(data)
+
+def iter_frames(parts, frame_size):
+    """
+    Regroup the parts produced by :meth:`AbstractCodec.iterencode` in frames.
+    Parts larger than a frame are split over multiple frames, without copying
+    the remainder of the part for each frame.
+
+    :param parts: an iterable of `bytes` parts
+    :param frame_size: the maximum length of a frame
+    :return: a generator of `bytes` frames, all frames except the last one
+        have length frame_size
+    """
+    buffered, buffered_length = [], 0
+    for part in parts:
+        part = memoryview(part)
+        while buffered_length + len(part) >= frame_size:
+            split = frame_size - buffered_length
+            buffered.append(part[:split])
+            yield b''.join(buffered)
+            part = part[split:]
+            buffered, buffered_length = [], 0
+        if len(part):
+            buffered.append(part)
+            buffered_length += len(part)
+    if len(buffered):
+        yield b''.join(buffered)
@@ -0,0 +1,265 @@
+"""
+Collection of timings and sizes of the requests handled by the model.
+
+Observations are passed to the exporters registered in :data:`metrics`.  When
+no exporters are registered, nothing is measured.  Each observation is
+labeled with the type of the request and the route of the action it
+concerns.
+
+Measured are :
+
+    * `camelot_request_bytes` : the size of the serialized request
+    * `camelot_request_deserialize_seconds` : the time to decode a request
+    * `camelot_request_generator_seconds` : the time spent in the generator of
+      an action run
+    * `camelot_request_steps` : the number of action steps yielded by the
+      generator of an action run
+    * `camelot_response_serialize_seconds` : the time to encode a response
+    * `camelot_response_bytes` : the size of the encoded response
+    * `camelot_leases` : the number of objects leased to the client, observed
+      when a lease is created or expires
+    * `camelot_leases_retained_bytes` : the approximate size of the leased
+      objects, observed when a lease is created or expires
+"""
+
+import bisect
+import contextlib
+import logging
+import os
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+# upper bounds of the histogram buckets, by unit of the metric
+seconds_buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+bytes_buckets = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+count_buckets = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+def get_buckets(metric):
+    """
+    :return: the upper bounds of the histogram buckets for a metric, based
+        on the suffix of its name.
+    """
+    if metric.endswith('_seconds'):
+        return seconds_buckets
+    if metric.endswith('_bytes'):
+        return bytes_buckets
+    return count_buckets
+
+
+class Histogram(object):
+    """
+    Cumulative histogram of observed values.
+
+    :param buckets: the sorted upper bounds of the buckets
+    """
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # the last count is for values larger than the last bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self):
+        if self.count:
+            return self.sum / self.count
+        return None
+
+    def quantile(self, q):
+        """
+        Estimate a quantile of the observed values, assuming the values are
+        evenly distributed within a bucket.
+
+        :param q: the quantile, between 0 and 1
+        :return: the estimate, or `None` if no values were observed
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative, lower = 0, 0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and (cumulative + count >= rank):
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.buckets[-1]
+
+
+class AbstractExporter(object):
+    """
+    Receives the observations of a :class:`MetricsRegistry`.
+    """
+
+    def observe(self, metric, labels, value):
+        """
+        :param metric: the name of the metric
+        :param labels: a tuple with the request type and the route of the
+            action, the route is `None` when not applicable.
+        :param value: the observed value
+        """
+        raise NotImplementedError()
+
+
+class HistogramExporter(AbstractExporter):
+    """
+    Keeps a :class:`Histogram` in memory for each metric and labels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = dict()
+
+    def observe(self, metric, labels, value):
+        key = (metric, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(get_buckets(metric))
+            histogram.observe(value)
+
+    def histograms(self):
+        """
+        :return: a dict mapping (metric, labels) to a copy of its
+            :class:`Histogram`
+        """
+        histograms = dict()
+        with self._lock:
+            for key, histogram in self._histograms.items():
+                copy = histograms[key] = Histogram(histogram.buckets)
+                copy.counts = list(histogram.counts)
+                copy.count = histogram.count
+                copy.sum = histogram.sum
+        return histograms
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def write_prometheus(self, stream):
+        """
+        Write the histograms to a text stream, in the Prometheus text
+        exposition format.
+        """
+        by_metric = dict()
+        for (metric, labels), histogram in sorted(
+            self.histograms().items(), key=lambda item: (item[0][0], str(item[0][1]))
+            ):
+            by_metric.setdefault(metric, []).append((labels, histogram))
+        for metric, histograms in by_metric.items():
+            stream.write('# TYPE {} histogram\n'.format(metric))
+            for (request_type, route), histogram in histograms:
+                label_text = 'request="{}",route="{}"'.format(
+                    _escape(request_type), _escape('/'.join(route or ()))
+                )
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    stream.write('{}_bucket{{{},le="{}"}} {}\n'.format(
+                        metric, label_text, bound, cumulative
+                    ))
+                stream.write('{}_bucket{{{},le="+Inf"}} {}\n'.format(
+                    metric, label_text, histogram.count
+                ))
+                stream.write('{}_sum{{{}}} {}\n'.format(metric, label_text, histogram.sum))
+                stream.write('{}_count{{{}}} {}\n'.format(metric, label_text, histogram.count))
+
+def _escape(label_value):
+    return str(label_value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PrometheusFileExporter(HistogramExporter):
+    """
+    Keeps histograms in memory and dumps them to a file in the Prometheus
+    text exposition format, to be picked up by the node exporter textfile
+    collector.
+
+    :param path: the name of the file to write
+    :param interval: when not `None`, the minimum number of seconds between
+        two automatic dumps of the file while observing values.
+    """
+
+    def __init__(self, path, interval=None):
+        super().__init__()
+        self.path = path
+        self.interval = interval
+        self._last_dump = time.monotonic()
+
+    def observe(self, metric, labels, value):
+        super().observe(metric, labels, value)
+        if (self.interval is not None) and (time.monotonic() - self._last_dump > self.interval):
+            self._last_dump = time.monotonic()
+            try:
+                self.dump()
+            except Exception as e:
+                LOGGER.warning('Could not write metrics to {}'.format(self.path), exc_info=e)
+
+    def dump(self):
+        """
+        Write the histograms to the file, the file is replaced at once so it
+        is never read partially written.
+        """
+        temp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(temp_path, 'w') as stream:
+            self.write_prometheus(stream)
+        os.replace(temp_path, self.path)
+
+
+class MetricsRegistry(object):
+    """
+    Passes observations to the registered exporters.
+
+    .. attribute:: exporters
+
+        the list of :class:`AbstractExporter` objects receiving the
+        observations.
+    """
+
+    def __init__(self):
+        self.exporters = []
+        self._local = threading.local()
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter):
+        self.exporters.remove(exporter)
+
+    @contextlib.contextmanager
+    def labels(self, request_type, route=None):
+        """
+        Context manager setting the labels of the observations without
+        explicit labels in the current thread.
+
+        :param request_type: the name of the request type
+        :param route: the route of the action, if any
+        """
+        previous = getattr(self._local, 'labels', None)
+        self._local.labels = (request_type, route)
+        try:
+            yield
+        finally:
+            self._local.labels = previous
+
+    def observe(self, metric, value, labels=None):
+        """
+        :param metric: the name of the metric
+        :param value: the observed value
+        :param labels: the labels of the observation, by default the labels
+            set with :meth:`labels` in the current thread
+        """
+        if labels is None:
+            labels = getattr(self._local, 'labels', None) or ('', None)
+        for exporter in self.exporters:
+            exporter.observe(metric, labels, value)
+
+metrics = MetricsRegistry()
@@ -8,18 +8,27 @@ import collections
 import datetime
 import decimal
 import functools
+import gc
+import json
 import logging
+import sys
+import threading
+import time
+import types
 import typing
 import weakref
 
+from dataclasses import dataclass, field
 from enum import Enum
 
 from camelot.core.qt import QtGui
 from camelot.core.utils import Arity
 
 from decimal import Decimal
-from sqlalchemy import inspect, orm
+from sqlalchemy import inspect, orm, tuple_
 
+from .codec import register_encoder_hook
+from .metrics import metrics
 from .singleton import Singleton
 
 LOGGER = logging.getLogger(__name__)
@@ -29,6 +38,17 @@ CompositeName = typing.Tuple[str, ...]
 # Unified name that can be either an atomic name or a composite name.
 Name = typing.Union[str, CompositeName]
 
+class TrustedName(tuple):
+    """
+    Full qualified composite name generated by a naming context, such as the names returned when binding an object.
+    As all of its atomic parts were validated when it was generated, naming contexts do not validate it again.
+    Names that are received from the client are plain tuples, and are validated before use.
+    """
+
+    __slots__ = ()
+
+register_encoder_hook(TrustedName, tuple)
+
 class BindingType(Enum):
 
     named_object = 1
@@ -54,6 +74,7 @@ class NamingException(Exception):
         already_bound = "A {} is already bound under the name '{}'"
         context_expected = 'Expected an instance of `camelot.core.naming.AbstractNamingContext`, instead got {0}'
         binding_immutable = 'Can not proceed: the {} binding under name {} is immutable'
+        binding_evicted = "The {} binding under name '{}' was evicted, as it was not used recently"
 
         invalid_name = 'The given name is invalid'
         # Invalid name reasons
@@ -91,6 +112,15 @@ class NameNotFoundException(NamingException):
         self.name = name
         self.binding_type = binding_type
 
+class EvictedBindingException(NameNotFoundException):
+    """A NameNotFoundException that is thrown when the binding for a name was evicted to limit the memory usage."""
+
+    def __init__(self, name, binding_type: BindingType):
+        assert binding_type in BindingType
+        NamingException.__init__(self, NamingException.Message.binding_evicted, binding_type.name.replace('_', ' '), name)
+        self.name = name
+        self.binding_type = binding_type
+
 class AlreadyBoundException(NamingException):
     """
     A NamingException that is thrown if an attempt is made to bind an object
@@ -215,6 +245,8 @@ class AbstractNamingContext(object):
             NamingException NamingException.Message.invalid_name: The supplied name is invalid (i.e., is None or has length less than 1).
         """
         name = self.get_composite_name(name)
+        if len(name) == 1:
+            return TrustedName((*self._name, name[0]))
         return (*self._name, *name)
 
     def bind(self, name: Name, obj: object, immutable=False) -> CompositeName:
@@ -315,6 +347,30 @@ class AbstractNamingContext(object):
         """
         raise NotImplementedError
 
+    def resolve_many(self, names: typing.Iterable[Name]) -> typing.List[object]:
+        """
+        Retrieve the objects bound to multiple names in the context.
+
+        :param names: Names of the objects, atomic or composite, and relative to this naming context.
+        :return: a list with the object bound to each name, in the order of the names.
+        """
+        return [self.resolve(name) for name in names]
+
+    def unbind_many(self, names: typing.Iterable[Name]) -> typing.List[CompositeName]:
+        """
+        Remove multiple object bindings from the context.  Names under which no object is bound are skipped.
+
+        :param names: Names of the objects, atomic or composite, and relative to this naming context.
+        :return: a list with the composite form of the names under which no object was bound.
+        """
+        not_found = []
+        for name in names:
+            try:
+                self.unbind(name)
+            except NameNotFoundException:
+                not_found.append(self.get_composite_name(name))
+        return not_found
+
     def list(self):
         """
         Returns the set of bindings in the naming context.
@@ -337,23 +393,78 @@ class AbstractNamingContext(object):
         for name in self.list():
             LOGGER.info(self.verbose_name(*self._name, name))
 
+    @check_bounded
+    def get_statistics(self, depth=None) -> NamingStatistics:
+        """
+        Collect statistics on the bindings in this context and its subcontexts.
+
+        :param depth: the number of levels of subcontexts to include in the statistics, `None` to
+            include all subcontexts.  The bindings of subcontexts beyond this depth are still counted.
+
+        :return: a `camelot.core.naming.NamingStatistics` object
+        """
+        return NamingStatistics(self._name, type(self).__name__)
+
+@dataclass
+class NamingStatistics(object):
+    """
+    Statistics of a naming context, the counts and sizes include those of its subcontexts.
+
+    .. attribute:: approximate_bytes
+
+        the approximate size of the objects kept alive by the strong bindings.  The bound objects and the objects
+        they refer to are counted, up to a limited depth and number of objects.
+        Objects referred to by multiple bindings of the same context are counted once, classes, modules and
+        functions are not counted.
+    """
+
+    name: CompositeName
+    context_type: str
+    strong_bindings: int = 0
+    weak_bindings: int = 0
+    context_bindings: int = 0
+    approximate_bytes: int = 0
+    subcontexts: typing.List[NamingStatistics] = field(default_factory=list)
+
+    def add(self, statistics: NamingStatistics):
+        """
+        Add the counts and sizes of a subcontext to those of this context.
+        """
+        self.strong_bindings += statistics.strong_bindings
+        self.weak_bindings += statistics.weak_bindings
+        self.context_bindings += statistics.context_bindings
+        self.approximate_bytes += statistics.approximate_bytes
+
+    def walk(self):
+        """
+        :return: a generator over the statistics of this context and all its subcontexts
+        """
+        yield self
+        for subcontext in self.subcontexts:
+            yield from subcontext.walk()
+
+# marks the absence of a binding, as None can be bound
+_unbound = object()
+
 class AbstractBindingStorage(object):
     """
     Abstract interface for name-to-object binding storage.
     """
 
-    def add(self, name, obj, immutable=False):
+    def add(self, name, obj, immutable=False, replace=True):
         """
         Store a binding for the given name and object with the given mutability.
-        If a binding already exists, an exception will be raised if it concerns an immutable binding,
+        If a binding already exists, an exception will be raised if it concerns an immutable binding or if it should not be replaced,
         otherwise the binding will be replaced by the new one.
 
         :param name: name under which to bind the object.
         :param obj: The object to bind with the given name
         :param immutable: flag that indicates whether the created binding should be immutable.
+        :param replace: flag that indicates whether an existing binding should be replaced.
 
         :raises:
             ImmutableBindingException NamingException.Message.binding_immutable: when an immutable binding already exists under the given name.
+            AlreadyBoundException NamingException.Message.already_bound: when a binding already exists under the given name and should not be replaced.
         """
         raise NotImplementedError
 
@@ -399,35 +510,49 @@ class BindingStorage(AbstractBindingStorage):
     """
     Default binding storage implementation that stores the bindings in a
     name-to-object dictionary.
+
+    The storage can be used from multiple threads.  Adding and removing bindings
+    is done while holding the lock of the storage.  Retrieving a binding does not
+    need the lock, as it is a single operation on the dictionary, and listing the
+    bindings is done on a copy of the names, so readers are never blocked by
+    other readers or writers.
     """
 
     def __init__(self, binding_type):
         self.binding_type = binding_type
         self._bindings = {}
-        self._immutable = []
-
-    def add(self, name, obj, immutable=False):
-        if name in self._bindings and name in self._immutable:
-            raise ImmutableBindingException(self.binding_type, name)
-        self._bindings[name] = obj
-        if immutable:
-            self._immutable.append(name)
+        self._immutable = set()
+        self._lock = threading.RLock()
+
+    def add(self, name, obj, immutable=False, replace=True):
+        with self._lock:
+            if name in self._bindings:
+                if not replace:
+                    raise AlreadyBoundException(name, self.binding_type)
+                if name in self._immutable:
+                    raise ImmutableBindingException(self.binding_type, name)
+            self._bindings[name] = obj
+            if immutable:
+                self._immutable.add(name)
 
     def remove(self, name):
-        if name not in self._bindings:
+        with self._lock:
+            if name in self._immutable and name in self._bindings:
+                raise ImmutableBindingException(self.binding_type, name)
+            obj = self._bindings.pop(name, _unbound)
+        if obj is _unbound:
             raise NameNotFoundException(name, self.binding_type)
-        if name in self._immutable:
-            raise ImmutableBindingException(self.binding_type, name)
-        return self._bindings.pop(name)
+        return obj
 
     def get(self, name):
-        if name not in self._bindings:
+        obj = self._bindings.get(name, _unbound)
+        if obj is _unbound:
             raise NameNotFoundException(name, self.binding_type)
-        return self._bindings[name]
+        return obj
 
     def copy(self):
         duplicate = self.__class__(self.binding_type)
-        for name, obj in self._bindings.items():
+        for name, obj in list(self._bindings.items()):
             duplicate.add(name, obj, immutable=name in self._immutable)
         return duplicate
 
@@ -435,7 +560,7 @@ class BindingStorage(AbstractBindingStorage):
         """
         Return the names of the bindings as valid names (tuples)
         """
-        for key in self._bindings.keys():
+        for key in list(self._bindings.keys()):
             yield (key,)
 
     def __contains__(self, name):
@@ -458,17 +583,118 @@ class WeakValueBindingStorage(BindingStorage):
         super().__init__(binding_type)
         self._bindings = weakref.WeakValueDictionary()
 
+class EvictingBindingStorage(BindingStorage):
+    """
+    Binding storage implementation that limits the number of bindings it keeps, by evicting the least recently used bindings.
+    Bindings are evicted when there are more than `max_bindings` bindings, or when they were not used for `max_idle` seconds.
+    A binding is used when it is added or retrieved, an idle binding is evicted when it is retrieved.  Immutable bindings
+    are never evicted.
+
+    The names of the most recently evicted bindings are remembered, retrieving such a name raises an
+    `camelot.core.naming.EvictedBindingException` instead of a `camelot.core.naming.NameNotFoundException`.
+
+    As retrieving a binding changes the order of use, it is done while holding the lock of the storage.
+    """
+
+    # the number of names of evicted bindings that are remembered
+    evicted_names = 1000
+
+    def __init__(self, binding_type, max_bindings=None, max_idle=None):
+        super().__init__(binding_type)
+        self.max_bindings = max_bindings
+        self.max_idle = max_idle
+        # in order of use, the least recently used binding first
+        self._bindings = collections.OrderedDict()
+        self._last_used = dict()
+        self._evicted = collections.OrderedDict()
+
+    def add(self, name, obj, immutable=False, replace=True):
+        with self._lock:
+            super().add(name, obj, immutable, replace)
+            self._bindings.move_to_end(name)
+            self._last_used[name] = time.monotonic()
+            self._evicted.pop(name, None)
+            self.evict()
+
+    def remove(self, name):
+        with self._lock:
+            obj = super().remove(name)
+            del self._last_used[name]
+            return obj
+
+    def get(self, name):
+        with self._lock:
+            if name in self._bindings:
+                now = time.monotonic()
+                if (self.max_idle is None) or (now - self._last_used[name] <= self.max_idle) or (name in self._immutable):
+                    self._bindings.move_to_end(name)
+                    self._last_used[name] = now
+                    return self._bindings[name]
+                # the binding was idle since the last eviction, as are the bindings used before it
+                self.evict()
+            if name in self._evicted:
+                raise EvictedBindingException(name, self.binding_type)
+            raise NameNotFoundException(name, self.binding_type)
+
+    def evict(self) -> int:
+        """
+        Evict the bindings that exceed the maximum number of bindings or were idle for too long.
+
+        :return: the number of evicted bindings
+        """
+        evicted = 0
+        with self._lock:
+            now = time.monotonic()
+            for name in list(self._bindings.keys()):
+                exceeding = (self.max_bindings is not None) and (len(self._bindings) > self.max_bindings)
+                idle = (self.max_idle is not None) and (now - self._last_used[name] > self.max_idle)
+                if not (exceeding or idle):
+                    break
+                if name in self._immutable:
+                    continue
+                del self._bindings[name]
+                del self._last_used[name]
+                self._evicted[name] = None
+                if len(self._evicted) > self.evicted_names:
+                    self._evicted.popitem(last=False)
+                evicted += 1
+        if evicted:
+            LOGGER.info('Evicted {} {} bindings'.format(evicted, self.binding_type.name.replace('_', ' ')))
+        return evicted
+
+# held while binding or unbinding a context, as a context can only be bound once
+_context_binding_lock = threading.Lock()
+
 class NamingContext(AbstractNamingContext):
     """
     Represents a naming context, which consists of a set of name-to-object bindings.
     It implements the AbstractNamingContext interface to provide methods for adding, examining and updating these bindings,
     as well as to define subcontexts that take part in recursive resolving of names.
+
+    A naming context can be used from multiple threads, each binding storage of the context has its own lock
+    to add or remove bindings, while names are resolved without locking.
     """
 
     def __init__(self):
         super().__init__()
         self._bindings = {btype: BindingStorage(btype) for btype in BindingType}
 
+    def get_composite_name(self, name: Name) -> CompositeName:
+        """
+        See `camelot.core.naming.AbstractNamingContext.get_composite_name`, trusted names are returned without validation.
+        """
+        if type(name) is TrustedName:
+            return name
+        return super().get_composite_name(name)
+
+    @staticmethod
+    def _get_tail(name: CompositeName) -> CompositeName:
+        # the name relative to the subcontext bound under its first part, a
+        # trusted name remains trusted within the subcontext
+        if type(name) is TrustedName:
+            return TrustedName(name[1:])
+        return name[1:]
+
     @AbstractNamingContext.check_bounded
     def bind(self, name: Name, obj: object, immutable=False) -> CompositeName:
         """
@@ -625,29 +851,34 @@ class NamingContext(AbstractNamingContext):
         if binding_type not in BindingType:
             raise NamingException(NamingException.Message.invalid_binding_type)
         if len(name) == 1:
-            # If binding, check if their exists one already
-            if name[0] in self._bindings[binding_type] and not rebind:
-                raise AlreadyBoundException(name[0], binding_type)
-            # Add the object and its mutability to the registry for the given binding_type.
-            self._bindings[binding_type].add(name[0], obj, immutable)
             # Determine the full qualified named of the bound object (extending that of this NamingContext).
-            qual_name = self.get_qual_name(name[0])
-            # If the object is a NamingContext, assign the qualified name.
+            qual_name = TrustedName((*self._name, name[0]))
+            # Add the object and its mutability to the registry for the given binding_type,
+            # if binding, the storage checks if there exists one already.
             if binding_type == BindingType.named_context:
-                if obj._name is not None:
-                    raise AlreadyBoundException(name[0], binding_type)
-                obj._name = qual_name
+                # If the object is a NamingContext, assign the qualified name,
+                # while no other thread can bind the same context.
+                with _context_binding_lock:
+                    if obj._name is not None:
+                        raise AlreadyBoundException(name[0], binding_type)
+                    self._bindings[binding_type].add(name[0], obj, immutable, replace=rebind)
+                    obj._name = qual_name
+            else:
+                self._bindings[binding_type].add(name[0], obj, immutable, replace=rebind)
+            if rebind:
+                InitialNamingContext._invalidate_resolved(qual_name, binding_type)
             return qual_name
         else:
             context = self._bindings[BindingType.named_context].get(name[0])
+            tail = self._get_tail(name)
             if binding_type == BindingType.named_context:
                 if rebind:
-                    return context.rebind_context(name[1:], obj)
-                return context.bind_context(name[1:], obj)
+                    return context.rebind_context(tail, obj)
+                return context.bind_context(tail, obj)
             elif binding_type == BindingType.named_object:
                 if rebind:
-                    return context.rebind(name[1:], obj)
-                return context.bind(name[1:], obj)
+                    return context.rebind(tail, obj)
+                return context.bind(tail, obj)
 
     @AbstractNamingContext.check_bounded
     def unbind(self, name: Name) -> None:
@@ -708,15 +939,20 @@ class NamingContext(AbstractNamingContext):
         if binding_type not in BindingType:
             raise NamingException(NamingException.Message.invalid_binding_type)
         if len(name) == 1:
-            obj = self._bindings[binding_type].remove(name[0])
             if binding_type == BindingType.named_context:
-                obj._name = None
+                with _context_binding_lock:
+                    obj = self._bindings[binding_type].remove(name[0])
+                    InitialNamingContext._invalidate_resolved((*self._name, name[0]), binding_type)
+                    obj._name = None
+            else:
+                self._bindings[binding_type].remove(name[0])
+                InitialNamingContext._invalidate_resolved((*self._name, name[0]), binding_type)
         else:
             context = self._bindings[BindingType.named_context].get(name[0])
             if binding_type == BindingType.named_context:
-                context.unbind_context(name[1:])
+                context.unbind_context(self._get_tail(name))
             elif binding_type == BindingType.named_object:
-                context.unbind(name[1:])
+                context.unbind(self._get_tail(name))
 
     @AbstractNamingContext.check_bounded
     def resolve(self, name: Name) -> object:
@@ -775,9 +1011,77 @@ class NamingContext(AbstractNamingContext):
         else:
             context = self._bindings[BindingType.named_context].get(name[0])
             if binding_type == BindingType.named_context:
-                return context.resolve_context(name[1:])
+                return context.resolve_context(self._get_tail(name))
             elif binding_type == BindingType.named_object:
-                return context.resolve(name[1:])
+                return context.resolve(self._get_tail(name))
+
+    @AbstractNamingContext.check_bounded
+    def resolve_many(self, names: typing.Iterable[Name]) -> typing.List[object]:
+        """
+        Resolve multiple names in this NamingContext and return the bound objects.
+        Names are grouped by their first atomic part, so each subcontext is resolved once
+        and resolves the remaining parts of all names in its group at once.
+
+        :param names: names under which the objects should have been bound, atomic or composite, and relative to this naming context.
+
+        :return: a list with the object bound under each name, in the order of the names.
+
+        :raises:
+            UnboundException NamingException.unbound: if this NamingContext has not been bound to a name yet.
+            NamingException NamingException.Message.invalid_name: when one of the names is invalid.
+            NameNotFoundException NamingException.Message.name_not_found: if no binding was found for one of the names.
+        """
+        objects = []
+        # first part mapped to the indexes and tails of the names within the subcontext
+        groups = dict()
+        for name in names:
+            name = self.get_composite_name(name)
+            if len(name) == 1:
+                objects.append(self._bindings[BindingType.named_object].get(name[0]))
+            else:
+                groups.setdefault(name[0], []).append((len(objects), self._get_tail(name)))
+                objects.append(None)
+        for name_part, group in groups.items():
+            context = self._bindings[BindingType.named_context].get(name_part)
+            for (index, _), obj in zip(group, context.resolve_many([tail for _, tail in group])):
+                objects[index] = obj
+        return objects
+
+    @AbstractNamingContext.check_bounded
+    def unbind_many(self, names: typing.Iterable[Name]) -> typing.List[CompositeName]:
+        """
+        Remove multiple object bindings from this NamingContext, names under which no object is bound are skipped.
+        Names are grouped by their first atomic part, so each subcontext is resolved once
+        and removes the bindings of all names in its group at once.
+
+        :param names: names under which the objects should have been bound, atomic or composite, and relative to this naming context.
+
+        :return: a list with the composite form of the names under which no object was bound.
+
+        :raises:
+            UnboundException NamingException.unbound: if this NamingContext has not been bound to a name yet.
+            NamingException NamingException.Message.invalid_name: when one of the names is invalid.
+            ImmutableBindingException NamingException.Message.binding_immutable: when trying to unbind an immutable object binding.
+        """
+        not_found = []
+        groups = dict()
+        for name in names:
+            name = self.get_composite_name(name)
+            if len(name) == 1:
+                try:
+                    self._remove_binding(name, BindingType.named_object)
+                except NameNotFoundException:
+                    not_found.append(name)
+            else:
+                groups.setdefault(name[0], []).append(self._get_tail(name))
+        for name_part, tails in groups.items():
+            try:
+                context = self._bindings[BindingType.named_context].get(name_part)
+            except NameNotFoundException:
+                not_found.extend((name_part, *tail) for tail in tails)
+                continue
+            not_found.extend((name_part, *tail) for tail in context.unbind_many(tails))
+        return not_found
 
     def list(self):
         yield from self._bindings[BindingType.named_object].list()
@@ -789,6 +1093,26 @@ class NamingContext(AbstractNamingContext):
     def __len__(self):
         return len(self._bindings[BindingType.named_object])
 
+    @AbstractNamingContext.check_bounded
+    def get_statistics(self, depth=None) -> NamingStatistics:
+        statistics = NamingStatistics(self._name, type(self).__name__)
+        object_storage = self._bindings[BindingType.named_object]
+        objects = list(object_storage._bindings.values())
+        if isinstance(object_storage, WeakValueBindingStorage):
+            statistics.weak_bindings = len(objects)
+        else:
+            statistics.strong_bindings = len(objects)
+            seen = set()
+            statistics.approximate_bytes = sum(_get_retained_size(obj, seen) for obj in objects)
+        contexts = list(self._bindings[BindingType.named_context]._bindings.values())
+        statistics.context_bindings = len(contexts)
+        for context in contexts:
+            subcontext_statistics = context.get_statistics(None if depth is None else depth - 1)
+            statistics.add(subcontext_statistics)
+            if (depth is None) or (depth > 0):
+                statistics.subcontexts.append(subcontext_statistics)
+        return statistics
+
 class EndpointNamingContext(AbstractNamingContext):
     """
     Interface for a naming context that only supports binding and resolving objects/values,
@@ -864,6 +1188,12 @@ class Constant(Enum):
     def atomic_type(self):
         return self._value_.atomic_type
 
+# The constant types of which the values are immutable, the names and values of these
+# types are memoized in both directions, for at most constant_memo_size values each.
+memoized_constants = frozenset((Constant.integer, Constant.string, Constant.decimal, Constant.time, Constant.date))
+memoized_constant_types = frozenset(constant.composite_type for constant in memoized_constants)
+constant_memo_size = 4096
+
 class ConstantNamingContext(EndpointNamingContext):
     """
     Represents a stateless endpoint naming context, that resolves objects using a constant name resolution strategy.
@@ -897,6 +1227,15 @@ class ConstantNamingContext(EndpointNamingContext):
             NamingException NamingException.Message.invalid_name: when the name is invalid.
             NameNotFoundException NamingException.Message.name_not_found: if no binding was found for the given name.
         """
+        if self.constant_type in memoized_constants:
+            try:
+                return _resolve_memoized_constant(self, name)
+            except TypeError:
+                # the name is not hashable, resolve it to raise the appropriate exception
+                pass
+        return self._resolve_constant(name)
+
+    def _resolve_constant(self, name: Name) -> object:
         name = self.get_composite_name(name)
         try:
             # Convert atomic parts if the composite type does not support string-conversion of its arguments.
@@ -943,6 +1282,10 @@ class ConstantNamingContext(EndpointNamingContext):
         """
         return []
 
+@functools.lru_cache(maxsize=constant_memo_size)
+def _resolve_memoized_constant(context: ConstantNamingContext, name: Name) -> object:
+    return context._resolve_constant(name)
+
 class EntityNamingContext(EndpointNamingContext):
     """
     Represents a stateless endpoint naming context, which handles resolving instances of a ´camelot.core.orm.entity.Entity´ class.
@@ -959,6 +1302,9 @@ class EntityNamingContext(EndpointNamingContext):
             AssertionError: if the provided entity class is not a subclass of ´camelot.core.orm.entity.Entity´
     """
 
+    # the maximum number of primary keys in the IN clause of a single query
+    in_clause_size = 500
+
     def __init__(self, entity):
         super().__init__()
         from vfinance.model.entity import EntityBase
@@ -1024,6 +1370,64 @@ class EntityNamingContext(EndpointNamingContext):
             raise NameNotFoundException(name[0], BindingType.named_object)
         return instance
 
+    @AbstractNamingContext.check_bounded
+    def resolve_many(self, names: typing.Iterable[Name]) -> typing.List[object]:
+        """
+        Resolve multiple names in this EntityNamingContext and return the bound objects.
+        Instances present in the identity map of their session are used as they are,
+        the other instances are queried with a single IN query per session, in chunks of `in_clause_size` primary keys.
+        When the python type of a primary key column is unknown, the names can not be converted to primary keys
+        to look them up, and each name is resolved with :meth:`resolve` instead.
+
+        :param names: names under which the objects should have been bound, atomic or composite, and relative to this naming context.
+
+        :return: a list with the instance bound under each name, in the order of the names.
+
+        :raises:
+            UnboundException NamingException.unbound: if this NamingContext has not been bound to a name yet.
+            NamingException NamingException.Message.invalid_name: when one of the names is invalid.
+            NameNotFoundException NamingException.Message.name_not_found: if no instance was found for one of the names.
+        """
+        mapper = orm.class_mapper(self.entity)
+        key_types = []
+        for column in mapper.primary_key:
+            try:
+                key_types.append(column.type.python_type)
+            except NotImplementedError:
+                return [self.resolve(name) for name in names]
+        objects = []
+        # session mapped to the primary keys to query, mapped to the indexes of their names
+        queries = dict()
+        for name in names:
+            name = self.get_composite_name(name)
+            session = orm.session._sessions.get(int(name[0]))
+            if session is None:
+                raise NameNotFoundException(name[0], BindingType.named_object)
+            primary_key = tuple(key_type(key) for key_type, key in zip(key_types, name[1:]))
+            instance = session.identity_map.get(mapper.identity_key_from_primary_key(primary_key))
+            state = inspect(instance) if instance is not None else None
+            if (state is not None) and not (state.expired or state.deleted):
+                objects.append(instance)
+            else:
+                queries.setdefault(session, dict()).setdefault(primary_key, []).append(len(objects))
+                objects.append(None)
+        if len(mapper.primary_key) == 1:
+            key_clause = mapper.primary_key[0]
+        else:
+            key_clause = tuple_(*mapper.primary_key)
+        for session, indexes in queries.items():
+            primary_keys = list(indexes.keys())
+            for i in range(0, len(primary_keys), self.in_clause_size):
+                chunk = primary_keys[i:i + self.in_clause_size]
+                if len(mapper.primary_key) == 1:
+                    chunk = [primary_key[0] for primary_key in chunk]
+                for instance in session.query(self.entity).filter(key_clause.in_(chunk)):
+                    for index in indexes.pop(tuple(mapper.primary_key_from_instance(instance)), []):
+                        objects[index] = instance
+            if len(indexes):
+                raise NameNotFoundException(str(session.hash_key), BindingType.named_object)
+        return objects
+
     def list(self):
         """
         The database might contain a very large number of entities, to avoid looping over all entities in the
@@ -1045,13 +1449,231 @@ class WeakRefNamingContext(NamingContext):
         super().__init__()
         self._bindings[BindingType.named_object] = WeakValueBindingStorage(BindingType.named_object)
 
+class EvictingNamingContext(NamingContext):
+    """
+    Specialized naming context that stores its named object bindings in an `camelot.core.naming.EvictingBindingStorage`,
+    to limit the memory used by objects the client might no longer use, but never unbinds.
+    Resolving the name of an evicted object raises an `camelot.core.naming.EvictedBindingException`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._bindings[BindingType.named_object] = EvictingBindingStorage(BindingType.named_object)
+        self._eviction_thread = None
+        self._stop_eviction = threading.Event()
+
+    def configure(self, max_bindings=None, max_idle=None):
+        """
+        Set the limits of the object bindings in this context, and evict the bindings that exceed them.  When a maximum
+        idle time is set, idle bindings are evicted in a background thread, also when no bindings are added.
+
+        :param max_bindings: the maximum number of object bindings, `None` to allow any number of bindings.
+        :param max_idle: the number of seconds after which an unused object binding is evicted, `None` to
+            keep unused bindings.
+        """
+        storage = self._bindings[BindingType.named_object]
+        storage.max_bindings = max_bindings
+        storage.max_idle = max_idle
+        storage.evict()
+        if (max_idle is not None) and (self._eviction_thread is None):
+            self._stop_eviction.clear()
+            self._eviction_thread = threading.Thread(
+                target=self._evict_periodically, daemon=True, name='camelot-eviction'
+            )
+            self._eviction_thread.start()
+        elif (max_idle is None) and (self._eviction_thread is not None):
+            self._stop_eviction.set()
+            self._eviction_thread = None
+
+    def _evict_periodically(self):
+        storage = self._bindings[BindingType.named_object]
+        while True:
+            max_idle = storage.max_idle
+            if max_idle is None or self._stop_eviction.wait(min(max(max_idle / 2, 1), 60)):
+                return
+            try:
+                storage.evict()
+            except Exception as e:
+                LOGGER.error('Could not evict idle bindings', exc_info=e)
+
+def _get_shallow_size(obj) -> int:
+    # the size of an object and the dictionary of its attributes
+    attributes = getattr(obj, '__dict__', None)
+    return sys.getsizeof(obj, 0) + (sys.getsizeof(attributes, 0) if attributes is not None else 0)
+
+def _get_approximate_size(obj) -> int:
+    # the size of an object, and of the objects in it when it is a tuple or list
+    size = _get_shallow_size(obj)
+    for item in (obj if isinstance(obj, (tuple, list)) else ()):
+        size += _get_shallow_size(item)
+    return size
+
+# objects shared by the whole application, not retained by a binding
+_shared_types = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, weakref.ref,
+)
+
+def _get_retained_size(obj, seen, max_depth=4, max_objects=10000) -> int:
+    # the size of an object and of the objects it refers to, walking the references breadth first up to
+    # a limited depth and number of objects.  the identities of the counted objects are added to seen, and
+    # objects already in seen are not counted again.
+    size, count, level = 0, 0, [obj]
+    for depth in range(max_depth + 1):
+        walked = []
+        for item in level:
+            if (id(item) in seen) or isinstance(item, _shared_types):
+                continue
+            seen.add(id(item))
+            size += sys.getsizeof(item, 0)
+            count += 1
+            if count >= max_objects:
+                return size
+            walked.append(item)
+        if not walked:
+            break
+        level = gc.get_referents(*walked)
+    return size
+
+class LeaseNamingContext(NamingContext):
+    """
+    Specialized naming context for objects that are leased to the client, and are kept alive until the client unbinds them.
+    To prevent a client that crashed or is slow from keeping large object graphs alive, a lease is released when
+    it outlives its time to live, or when the maximum number of leases is exceeded, in which case the oldest lease is released.
+    Only the object bindings directly in this context are leases.
+
+    The number of live leases and the approximate number of bytes they retain are observed as the
+    `camelot_leases` and `camelot_leases_retained_bytes` metrics, see `camelot.core.metrics`.
+
+    .. attribute:: ttl
+
+        the number of seconds after which a lease is released, `None` to keep leases until they are unbound.
+
+    .. attribute:: max_leases
+
+        the maximum number of leases, `None` to allow any number of leases.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.ttl = None
+        self.max_leases = None
+        self._lock = threading.RLock()
+        # name of each lease mapped to its deadline and approximate size, in order of binding
+        self._leases = collections.OrderedDict()
+        self._retained_bytes = 0
+        self._expiry_thread = None
+        self._stop_expiry = threading.Event()
+
+    def configure(self, ttl=None, max_leases=None):
+        """
+        Set the limits of the leases, and release the leases that exceed them.  When a time to live is set,
+        expired leases are released in a background thread.
+
+        :param ttl: the number of seconds after which a lease is released, `None` to keep leases until they are unbound.
+        :param max_leases: the maximum number of leases, `None` to allow any number of leases.
+        """
+        with self._lock:
+            self.ttl = ttl
+            self.max_leases = max_leases
+            # leases bound without a time to live expire from now on
+            if ttl is not None:
+                for name, (deadline, size) in self._leases.items():
+                    if deadline is None:
+                        self._leases[name] = (time.monotonic() + ttl, size)
+            self._release_exceeding()
+        if (ttl is not None) and (self._expiry_thread is None):
+            self._stop_expiry.clear()
+            self._expiry_thread = threading.Thread(
+                target=self._expire_periodically, daemon=True, name='camelot-lease-expiry'
+            )
+            self._expiry_thread.start()
+        elif (ttl is None) and (self._expiry_thread is not None):
+            self._stop_expiry.set()
+            self._expiry_thread = None
+
+    def _expire_periodically(self):
+        while True:
+            ttl = self.ttl
+            if ttl is None or self._stop_expiry.wait(min(max(ttl / 2, 1), 60)):
+                return
+            try:
+                self.expire()
+            except Exception as e:
+                LOGGER.error('Could not release expired leases', exc_info=e)
+
+    def expire(self) -> int:
+        """
+        Release the leases that outlived their time to live.
+
+        :return: the number of released leases
+        """
+        now = time.monotonic()
+        released = 0
+        with self._lock:
+            for name, (deadline, _size) in list(self._leases.items()):
+                if (deadline is not None) and (deadline <= now):
+                    self._remove_binding(name, BindingType.named_object)
+                    released += 1
+            if released:
+                LOGGER.warning('Released {} expired leases, the client did not unbind them'.format(released))
+                self._observe()
+        return released
+
+    def _release_exceeding(self):
+        # release the oldest leases while there are more than allowed, called while holding the lock
+        while (self.max_leases is not None) and (len(self._leases) > self.max_leases):
+            name = next(iter(self._leases))
+            LOGGER.warning('Maximum number of {} leases reached, releasing lease {}'.format(self.max_leases, name))
+            self._remove_binding(name, BindingType.named_object)
+
+    def _observe(self):
+        metrics.observe('camelot_leases', len(self._leases))
+        metrics.observe('camelot_leases_retained_bytes', self._retained_bytes)
+
+    def _add_binding(self, name: Name, obj, rebind: bool, binding_type: BindingType, immutable=False) -> CompositeName:
+        with self._lock:
+            qual_name = super()._add_binding(name, obj, rebind, binding_type, immutable)
+            if (binding_type == BindingType.named_object) and (len(qual_name) == len(self._name) + 1):
+                previous = self._leases.pop(qual_name[-1], None)
+                if previous is not None:
+                    self._retained_bytes -= previous[1]
+                deadline = time.monotonic() + self.ttl if self.ttl is not None else None
+                size = _get_approximate_size(obj)
+                self._leases[qual_name[-1]] = (deadline, size)
+                self._retained_bytes += size
+                self._release_exceeding()
+                self._observe()
+            return qual_name
+
+    def _remove_binding(self, name: Name, binding_type: BindingType) -> None:
+        with self._lock:
+            super()._remove_binding(name, binding_type)
+            if binding_type == BindingType.named_object:
+                name = self.get_composite_name(name)
+                if len(name) == 1:
+                    lease = self._leases.pop(name[0], None)
+                    if lease is not None:
+                        self._retained_bytes -= lease[1]
+
 class InitialNamingContext(NamingContext, metaclass=Singleton):
     """
     Singleton class that is the starting context for performing naming operations.
     All naming operations are relative to a context.
     This initial context implements the NamingContext interface and provides the starting point for resolution of names.
+
+    Objects resolved through the initial context are cached by their full composite name, so resolving the same
+    name again does not walk and validate the context hierarchy.  Only names bound in plain naming contexts are
+    cached, as endpoint contexts resolve to new objects and weak references may disappear.  The cache entries
+    are invalidated when their binding, or a context containing it, is rebound or unbound.
     """
 
+    # full composite name of a resolved object mapped to the object
+    _resolved = dict()
+    # incremented on each invalidation, to detect bindings changing during a resolve
+    _generation = 0
+    # held while changing the cache, looking up a name in the cache does not need the lock
+    _resolved_lock = threading.Lock()
+
     def __init__(self):
         super().__init__()
         # Initialize the name of this InitialNamingContext to the empty tuple,
@@ -1068,9 +1690,82 @@ class InitialNamingContext(NamingContext, metaclass=Singleton):
         constants.bind('false', False, immutable=True)
         self.bind_new_context('entity', immutable=True)
         self.bind_new_context('object', immutable=True)
-        self.bind_new_context('leases', immutable=True)
+        self.bind_context('leases', LeaseNamingContext(), immutable=True)
         self.bind_context('transient', WeakRefNamingContext(), immutable=True)
 
+    @classmethod
+    def _invalidate_resolved(cls, qual_name: CompositeName, binding_type: BindingType):
+        """
+        Remove the cached resolutions that depend on a binding that is being rebound or unbound.
+
+        :param qual_name: the full qualified composite name of the binding.
+        :param binding_type: the type of the binding, for a context all names within the context are removed.
+        """
+        with cls._resolved_lock:
+            cls._generation += 1
+            if binding_type == BindingType.named_object:
+                cls._resolved.pop(qual_name, None)
+            else:
+                length = len(qual_name)
+                for name in [name for name in cls._resolved if name[:length] == qual_name]:
+                    cls._resolved.pop(name, None)
+
+    @classmethod
+    def _cache_resolved(cls, name: CompositeName, obj, generation: int):
+        # store a resolved object, unless a binding changed since the resolve started
+        with cls._resolved_lock:
+            if generation == cls._generation:
+                cls._resolved[name] = obj
+
+    def _cacheable(self, name: CompositeName) -> bool:
+        # a resolved name can be cached when it was resolved through plain
+        # naming contexts, with a strong reference to the object
+        context = self
+        for name_part in name[:-1]:
+            context = context._bindings[BindingType.named_context]._bindings.get(name_part)
+            if not isinstance(context, NamingContext):
+                return False
+        return type(context._bindings[BindingType.named_object]) == BindingStorage
+
+    def resolve(self, name: Name) -> object:
+        """
+        Resolve a name in the initial naming context and return the bound object, using the cached
+        resolution of the name if available.
+        See `camelot.core.naming.NamingContext.resolve`.
+        """
+        try:
+            return self._resolved[name]
+        except (KeyError, TypeError):
+            pass
+        generation = self._generation
+        obj = super().resolve(name)
+        if isinstance(name, tuple) and (generation == self._generation) and self._cacheable(name):
+            self._cache_resolved(name, obj, generation)
+        return obj
+
+    def resolve_many(self, names: typing.Iterable[Name]) -> typing.List[object]:
+        """
+        Resolve multiple names in the initial naming context, using the cached resolution of the names if available.
+        See `camelot.core.naming.NamingContext.resolve_many`.
+        """
+        objects = []
+        # indexes and names that are not in the cache
+        missing = []
+        for name in names:
+            try:
+                objects.append(self._resolved[name])
+            except (KeyError, TypeError):
+                missing.append((len(objects), name))
+                objects.append(None)
+        if len(missing):
+            generation = self._generation
+            resolved = super().resolve_many([name for _, name in missing])
+            for (index, name), obj in zip(missing, resolved):
+                objects[index] = obj
+                if isinstance(name, tuple) and (generation == self._generation) and self._cacheable(name):
+                    self._cache_resolved(name, obj, generation)
+        return objects
+
     def new_context(self) -> NamingContext:
         """
         Create and return a new `camelot.core.naming.NamingContext` instance.
@@ -1099,21 +1794,12 @@ class InitialNamingContext(NamingContext, metaclass=Singleton):
             return ('constant', 'null')
         if isinstance(obj, bool):
             return ('constant', 'true' if obj else 'false')
-        for constant_type in Constant:
-            if isinstance(obj, constant_type.composite_type):
-                base_name = ('constant', constant_type.name)
-                # Important to put the check on datetime first here, before the date check
-                # as datetimes are also dates.
-                if isinstance(obj, Constant.time.composite_type):
-                    return (*base_name, *[str(atomic_name) for atomic_name in [obj.year, obj.month, obj.day, obj.hour, obj.minute, obj.second]])
-                if isinstance(obj, Constant.date.composite_type):
-                    return (*base_name, *[str(atomic_name) for atomic_name in [obj.year, obj.month, obj.day]])
-                if isinstance(obj, Constant.decimal.composite_type):
-                    # Normalize decimals to remove trailing zeros, to allow equality comparisons between named bindings.
-                    return (*base_name, str(obj.normalize()))
-                if isinstance(obj, Constant.color.composite_type):
-                    return (*base_name, obj.name())
-                return (*base_name, str(obj))
+        obj_type = type(obj)
+        if (obj_type in memoized_constant_types) and (getattr(obj, 'tzinfo', None) is None):
+            return _get_memoized_constant_name(obj_type, obj)
+        constant_name = _get_constant_name(obj)
+        if constant_name is not None:
+            return constant_name
         if isinstance(obj, Entity):
             session = orm.object_session(obj)
             if session is None:
@@ -1128,4 +1814,85 @@ class InitialNamingContext(NamingContext, metaclass=Singleton):
         LOGGER.warn('Binding non-delegated object of type {}'.format(type(obj)))
         return self.rebind(('object', str(hash(obj))), obj)
 
+def _get_constant_name(obj) -> CompositeName:
+    # the name of an object of one of the constant types, None for other objects
+    for constant_type in Constant:
+        if isinstance(obj, constant_type.composite_type):
+            base_name = ('constant', constant_type.name)
+            # Important to put the check on datetime first here, before the date check
+            # as datetimes are also dates.
+            if isinstance(obj, Constant.time.composite_type):
+                return (*base_name, *[str(atomic_name) for atomic_name in [obj.year, obj.month, obj.day, obj.hour, obj.minute, obj.second]])
+            if isinstance(obj, Constant.date.composite_type):
+                return (*base_name, *[str(atomic_name) for atomic_name in [obj.year, obj.month, obj.day]])
+            if isinstance(obj, Constant.decimal.composite_type):
+                # Normalize decimals to remove trailing zeros, to allow equality comparisons between named bindings.
+                return (*base_name, str(obj.normalize()))
+            if isinstance(obj, Constant.color.composite_type):
+                return (*base_name, obj.name())
+            return (*base_name, str(obj))
+    return None
+
+@functools.lru_cache(maxsize=constant_memo_size)
+def _get_memoized_constant_name(obj_type, obj) -> CompositeName:
+    # the type is part of the key, as values of different types can be equal
+    return _get_constant_name(obj)
+
 initial_naming_context = InitialNamingContext()
+
+class NamingSnapshots(object):
+    """
+    Writes the statistics of the naming contexts to a file at a regular interval, to find the contexts
+    that keep growing.  Each snapshot is written as a line of json, with the keys :
+
+        * `time` : the number of seconds since the epoch
+        * `contexts` : the '/' joined name of each context mapped to its strong bindings, weak bindings,
+          context bindings and approximate bytes, see `camelot.core.naming.NamingStatistics`.
+
+    :param path: the name of the file to which snapshots are appended
+    :param interval: the number of seconds between two snapshots
+    :param depth: the number of levels of subcontexts of the initial naming context in a snapshot
+    """
+
+    def __init__(self, path, interval=60, depth=2):
+        self.path = path
+        self.interval = interval
+        self.depth = depth
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='camelot-naming-snapshots')
+        self._thread.start()
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                LOGGER.warning('Could not write naming snapshot to {}'.format(self.path), exc_info=e)
+
+    def snapshot(self) -> dict:
+        """
+        Write a snapshot of the naming contexts to the file.
+
+        :return: the snapshot
+        """
+        statistics = initial_naming_context.get_statistics(self.depth)
+        snapshot = {'time': time.time(), 'contexts': {
+            '/'.join(context.name): [
+                context.strong_bindings, context.weak_bindings, context.context_bindings, context.approximate_bytes
+            ] for context in statistics.walk()
+        }}
+        with open(self.path, 'a') as stream:
+            stream.write(json.dumps(snapshot) + '\n')
+        return snapshot
@@ -0,0 +1,148 @@
+"""
+Sampling profiler for the requests handled by the model.
+
+While the profiler runs, the stacks of the threads handling a request are
+sampled at a fixed interval.  Each stack is prefixed with the type of the
+request and the route of the action, and the stacks are written in the
+folded format, one stack and its number of samples per line, as accepted
+by `flamegraph.pl`, `inferno` and `speedscope`.
+
+The profiler of the model is :data:`model_profiler`, it is started and
+stopped by the :class:`camelot.view.action_steps.StartProfiler` and
+:class:`camelot.view.action_steps.StopProfiler` action steps.
+"""
+
+import collections
+import contextlib
+import datetime
+import logging
+import os
+import sys
+import tempfile
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SamplingProfiler(object):
+    """
+    Samples the stacks of the threads handling requests.
+
+    :param interval: the time in seconds between two samples
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        # thread identifier mapped to the label of the request it handles
+        self._labels = dict()
+        self._stacks = collections.Counter()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        """
+        Start sampling, previously collected samples are discarded.
+        """
+        if self.running:
+            return
+        self._stacks = collections.Counter()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, daemon=True, name='camelot-profiler'
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop sampling.
+
+        :return: a :class:`collections.Counter` with the number of samples of
+            each folded stack
+        """
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+        return self._stacks
+
+    @contextlib.contextmanager
+    def request(self, request_type, route=None):
+        """
+        Context manager marking the current thread as handling a request, the
+        thread is sampled while the profiler runs.
+
+        :param request_type: the name of the request type
+        :param route: the route of the action, if any
+        """
+        ident = threading.get_ident()
+        previous = self._labels.get(ident)
+        if route:
+            self._labels[ident] = '{} {}'.format(request_type, '/'.join(route))
+        else:
+            self._labels[ident] = request_type
+        try:
+            yield
+        finally:
+            if previous is None:
+                del self._labels[ident]
+            else:
+                self._labels[ident] = previous
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, label in self._labels.copy().items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._stacks[self._fold(label, frame)] += 1
+
+    @staticmethod
+    def _fold(label, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append('{} ({}:{})'.format(
+                code.co_name, os.path.basename(code.co_filename), code.co_firstlineno
+            ))
+            frame = frame.f_back
+        names.append(label)
+        names.reverse()
+        return ';'.join(names)
+
+    def dump(self, directory=None):
+        """
+        Stop sampling and write the folded stacks to a file.
+
+        :param directory: the directory in which to write the file, by default
+            the `CAMELOT_PROFILE_DIR` setting or the temporary directory.
+        :return: the name of the file
+        """
+        if directory is None:
+            from .conf import settings
+            directory = settings.get('CAMELOT_PROFILE_DIR', None) or tempfile.gettempdir()
+        stacks = self.stop()
+        path = os.path.join(directory, 'camelot-model-{}.folded'.format(
+            datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        ))
+        write_folded(stacks, path)
+        LOGGER.info('Model profile with {} samples written to {}'.format(
+            sum(stacks.values()), path
+        ))
+        return path
+
+def write_folded(stacks, path):
+    """
+    Write stacks in the folded format
+
+    :param stacks: a mapping of folded stacks to their number of samples
+    :param path: the name of the file
+    """
+    with open(path, 'w') as stream:
+        for stack, count in sorted(stacks.items()):
+            stream.write('{} {}\n'.format(stack, count))
+
+model_profiler = SamplingProfiler()
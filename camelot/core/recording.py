@@ -0,0 +1,278 @@
+"""
+Recording and replay of the requests and responses exchanged between the
+GUI and the model.
+
+A recording is a file with one json object per line, each object has the
+keys :
+
+    * `time` : the number of seconds since the start of the recording
+    * `direction` : either `request` or `response`
+    * `data` : the serialized message as a string, or `base64` : the base64
+      encoded message when it is in a binary wire format
+    * `wire_format` : the wire format of a response, only present when it
+      is not json
+
+Requests are recorded as they were received, responses as they were sent,
+in the wire format of the connection.  Responses sent in multiple frames
+are recorded frame by frame, as the frames are binary messages they are
+base64 encoded.
+
+A recording can be replayed without Qt or the C++ backend with
+:func:`replay`, provided the application has bound the same actions and
+admins as when the recording was made.  The names of action runs differ
+between sessions, runs in replayed requests are matched with the runs of
+the replay through their gui run name.  To replay from the command line ::
+
+    python -m camelot.core.recording session.jsonl --setup myapp.main:setup
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+LOGGER = logging.getLogger(__name__)
+
+class Recorder(object):
+    """
+    Writes requests and responses to a recording file.  Messages can be
+    recorded from any thread.
+
+    :param path: the name of the file to write
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stream = open(path, 'w')
+        self._started = time.monotonic()
+
+    def _record(self, direction, data, wire_format='json'):
+        record = {'time': time.monotonic() - self._started, 'direction': direction}
+        if wire_format != 'json':
+            record['wire_format'] = wire_format
+        if isinstance(data, str):
+            record['data'] = data
+        elif data[:1] in (b'[', b'{'):
+            record['data'] = data.decode()
+        else:
+            record['base64'] = base64.b64encode(data).decode()
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            self._stream.write(line)
+            self._stream.flush()
+
+    def record_request(self, data):
+        """
+        :param data: the request, as received from the client
+        """
+        self._record('request', data)
+
+    def record_response(self, data, wire_format='json'):
+        """
+        :param data: the response, or a frame of it, as sent to the client
+        :param wire_format: the wire format in which the response is encoded
+        """
+        self._record('response', data, wire_format)
+
+    def close(self):
+        with self._lock:
+            self._stream.close()
+
+
+def read_recording(path):
+    """
+    :return: a generator of (time, direction, data, wire_format) tuples,
+        with data the recorded message as bytes
+    """
+    with open(path) as stream:
+        for line in stream:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'data' in record:
+                data = record['data'].encode()
+            else:
+                data = base64.b64decode(record['base64'])
+            yield record['time'], record['direction'], data, record.get('wire_format', 'json')
+
+
+class StubResponseHandler(object):
+    """
+    Response and cancel handler to execute requests without a client.  The
+    responses are encoded in the wire format of the handler, to include
+    their serialization in measurements, but not sent anywhere.
+
+    .. attribute:: responses
+
+        the number of responses sent since the creation of the handler
+
+    .. attribute:: response_bytes
+
+        the total size of the encoded responses
+    """
+
+    busy_threshold = None
+    scheduler = None
+
+    def __init__(self):
+        self.wire_format = 'json'
+        self.frame_size = None
+        self.responses = 0
+        self.response_bytes = 0
+        # gui run name mapped to the run name of the replay
+        self.run_names = dict()
+
+    def send_response(self, response):
+        from .codec import get_codec
+        codec = get_codec(self.wire_format)
+        data = response._to_bytes(codec)
+        self.responses += 1
+        self.response_bytes += len(data)
+        if type(response).__name__ in ('ActionStepped', 'BatchResponse'):
+            for gui_run_name, run_name in _iter_runs(codec.decode(data)):
+                self.run_names[gui_run_name] = run_name
+
+    def has_cancel_request(self, run_name):
+        from ..view.requests import cancel_requests
+        return cancel_requests.pop(run_name)
+
+
+def _iter_runs(response):
+    # yield the (gui_run_name, run_name) pairs in a serialized response
+    response_type_name, response_data = response
+    if response_type_name == 'BatchResponse':
+        for batched in response_data['responses']:
+            yield from _iter_runs(batched)
+    elif response_type_name == 'ActionStepped':
+        run_name = tuple(response_data['run_name'])
+        if run_name != ('constant', 'null'):
+            yield tuple(response_data['gui_run_name']), run_name
+
+
+@dataclass
+class ReplayedRequest(object):
+    """
+    Measurements of a single replayed request
+    """
+
+    request_type: str
+    recorded_time: float
+    duration: float
+    responses: int
+    response_bytes: int
+
+
+def replay(path, response_handler=None, speed=None):
+    """
+    Execute the requests in a recording.
+
+    :param path: the name of the recording file
+    :param response_handler: the handler for the responses, by default a
+        :class:`StubResponseHandler`
+    :param speed: `None` to execute the requests as fast as possible,
+        otherwise the speed relative to the recording, eg. 1 to execute the
+        requests at the time they were recorded.
+    :return: a list of :class:`ReplayedRequest` objects
+    """
+    from .codec import get_codec
+    from ..view.requests import AbstractRequest
+    response_handler = response_handler or StubResponseHandler()
+    # the runs in the recording, mapped to their gui run name
+    recorded_runs = dict()
+    for response in _iter_responses(path):
+        for gui_run_name, run_name in _iter_runs(response):
+            recorded_runs[run_name] = gui_run_name
+    replayed = []
+    started = time.monotonic()
+    for recorded_time, direction, data, _ in read_recording(path):
+        if direction != 'request':
+            continue
+        if speed is not None:
+            delay = recorded_time / speed - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+        responses = response_handler.responses
+        response_bytes = response_handler.response_bytes
+        request_started = time.perf_counter()
+        request_type_name, request_data = AbstractRequest.decode_request(
+            data, get_codec(response_handler.wire_format)
+        )
+        _rename_runs(request_data, recorded_runs, response_handler.run_names)
+        try:
+            AbstractRequest.dispatch_request(
+                request_type_name, request_data, response_handler, response_handler
+            )
+        except Exception as e:
+            LOGGER.error('Unhandled exception replaying {} request'.format(request_type_name), exc_info=e)
+        replayed.append(ReplayedRequest(
+            request_type=request_type_name,
+            recorded_time=recorded_time,
+            duration=time.perf_counter() - request_started,
+            responses=response_handler.responses - responses,
+            response_bytes=response_handler.response_bytes - response_bytes,
+        ))
+    return replayed
+
+def _iter_responses(path):
+    # yield the decoded responses in a recording, joining the frames of
+    # responses sent in multiple frames
+    from .codec import get_codec
+    from ..view.responses import ResponseFrame
+    streams = dict()
+    for _, direction, data, wire_format in read_recording(path):
+        if direction != 'response':
+            continue
+        codec = get_codec(wire_format)
+        if data[:1] == ResponseFrame.marker:
+            frame = ResponseFrame.from_message(data, codec)
+            streams.setdefault(frame.stream, []).append(frame.data)
+            if not frame.last:
+                continue
+            data = b''.join(streams.pop(frame.stream))
+        yield codec.decode(data)
+
+def _rename_runs(request_data, recorded_runs, run_names):
+    # replace the recorded run names in the request by those of the replay
+    if 'run_name' in request_data:
+        gui_run_name = recorded_runs.get(tuple(request_data['run_name']))
+        if gui_run_name in run_names:
+            request_data['run_name'] = run_names[gui_run_name]
+    for _, batched_data in request_data.get('requests', []):
+        _rename_runs(batched_data, recorded_runs, run_names)
+
+def _main():
+    import argparse
+    import importlib
+    import statistics
+    parser = argparse.ArgumentParser(description='Replay a recorded session')
+    parser.add_argument('recording', help='the name of the recording file')
+    parser.add_argument(
+        '--setup', help='module:function to call to set up the application before the replay'
+    )
+    parser.add_argument(
+        '--speed', type=float, default=None,
+        help='speed relative to the recording, as fast as possible if omitted'
+    )
+    args = parser.parse_args()
+    if args.setup is not None:
+        module_name, function_name = args.setup.split(':')
+        getattr(importlib.import_module(module_name), function_name)()
+    replayed = replay(args.recording, speed=args.speed)
+    by_type = dict()
+    for request in replayed:
+        by_type.setdefault(request.request_type, []).append(request)
+    print('{:<24} {:>8} {:>12} {:>12} {:>14}'.format(
+        'request', 'count', 'mean (ms)', 'max (ms)', 'response bytes'
+    ))
+    for request_type, requests in sorted(by_type.items()):
+        durations = [r.duration * 1000 for r in requests]
+        print('{:<24} {:>8} {:>12.3f} {:>12.3f} {:>14}'.format(
+            request_type, len(requests), statistics.mean(durations),
+            max(durations), sum(r.response_bytes for r in requests)
+        ))
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,192 @@
+"""
+Execution of model side tasks on a pool of worker threads.
+"""
+
+import collections
+import logging
+import threading
+from enum import IntEnum
+
+LOGGER = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class Lane(IntEnum):
+    """
+    The priority of a task, tasks in a lane with a lower value are executed
+    first.
+    """
+
+    interactive = 0
+    bulk = 1
+
+
+class Scheduler(object):
+    """
+    Executes tasks on a pool of worker threads.  Each task belongs to a
+    strand, tasks of the same strand are executed one after the other, in the
+    order in which they were submitted.  Tasks of different strands are
+    executed concurrently.
+
+    Each task is submitted in a :class:`Lane`.  When a worker thread becomes
+    available, it executes the first task of the interactive lane before
+    those of the bulk lane.  Tasks in the bulk lane can further give way to
+    interactive tasks by calling :func:`preemption_point`.  This includes the
+    interactive tasks waiting in the strand of the bulk task itself, those
+    are executed in the thread of the bulk task, before the bulk task
+    continues and before the other tasks waiting in the strand.
+
+    After each task, the next task of its strand is queued behind the tasks
+    already waiting in its lane, so a strand with many tasks does not starve
+    the other strands.
+
+    :param max_workers: the maximum number of worker threads
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._lock = threading.Condition()
+        # the strands with a task ready or executing, mapped to their
+        # pending tasks
+        self._strands = dict()
+        # per lane, the tasks that can be executed
+        self._ready = {lane: collections.deque() for lane in Lane}
+        self._threads = []
+        self._idle = 0
+        self._shutdown = False
+
+    def submit(self, strand, function, *args, lane=Lane.bulk):
+        """
+        Submit a task for execution
+
+        :param strand: a hashable key identifying the strand of the task
+        :param function: the function to call in a worker thread
+        :param args: the arguments to call the function with
+        :param lane: the :class:`Lane` of the task
+        """
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('Cannot submit tasks after shutdown')
+            pending = self._strands.get(strand)
+            if pending is not None:
+                pending.append((lane, function, args))
+                return
+            self._strands[strand] = collections.deque()
+            self._ready[lane].append((strand, lane, function, args))
+            if self._idle:
+                self._lock.notify_all()
+            elif len(self._threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self._work, daemon=True,
+                    name='camelot-model-{}'.format(len(self._threads)),
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def _next_task(self):
+        # called while holding the lock
+        for lane in Lane:
+            ready = self._ready[lane]
+            if len(ready):
+                return ready.popleft()
+        return None
+
+    def _work(self):
+        _local.scheduler = self
+        while True:
+            with self._lock:
+                task = self._next_task()
+                while task is None:
+                    if self._shutdown:
+                        return
+                    self._idle += 1
+                    self._lock.wait()
+                    self._idle -= 1
+                    task = self._next_task()
+            self._execute(*task)
+
+    def _run(self, strand, lane, function, args):
+        previous_strand = getattr(_local, 'strand', None)
+        previous_lane = getattr(_local, 'lane', None)
+        _local.strand, _local.lane = strand, lane
+        try:
+            function(*args)
+        except Exception as e:
+            LOGGER.error('Unhandled exception in strand {}'.format(strand), exc_info=e)
+        finally:
+            _local.strand, _local.lane = previous_strand, previous_lane
+
+    def _execute(self, strand, lane, function, args):
+        self._run(strand, lane, function, args)
+        with self._lock:
+            pending = self._strands[strand]
+            if not len(pending):
+                del self._strands[strand]
+                self._lock.notify_all()
+                return
+            lane, function, args = pending.popleft()
+            self._ready[lane].append((strand, lane, function, args))
+            self._lock.notify_all()
+
+    def _next_interactive_task(self, strand):
+        # called while holding the lock, the interactive tasks waiting in
+        # the strand of the current task go before those of other strands
+        pending = self._strands[strand]
+        for i, (lane, function, args) in enumerate(pending):
+            if lane == Lane.interactive:
+                del pending[i]
+                return (lane, function, args)
+        return None
+
+    def _preempt(self):
+        # execute the ready interactive tasks in the current thread
+        strand = _local.strand
+        interactive = self._ready[Lane.interactive]
+        while True:
+            with self._lock:
+                task = self._next_interactive_task(strand)
+                if task is not None:
+                    # the strand is still executing the current task, so
+                    # the task is run without scheduling the next one
+                    execute, task = self._run, (strand,) + task
+                elif len(interactive):
+                    execute, task = self._execute, interactive.popleft()
+                else:
+                    return
+            execute(*task)
+
+    def pending_strands(self):
+        """
+        :return: the number of strands with tasks ready or executing
+        """
+        with self._lock:
+            return len(self._strands)
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting tasks and release the worker threads.
+
+        :param wait: wait until all submitted tasks are executed
+        """
+        with self._lock:
+            if wait:
+                self._lock.wait_for(lambda: not len(self._strands))
+            self._shutdown = True
+            self._lock.notify_all()
+        if wait:
+            for thread in self._threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+
+def preemption_point():
+    """
+    Called by a task at a point where it can be interrupted.  When the task
+    executes in the bulk lane of a :class:`Scheduler`, the tasks waiting in
+    the interactive lane, and the interactive tasks waiting in the strand of
+    the task, are executed first.  Otherwise this function does nothing.
+    """
+    scheduler = getattr(_local, 'scheduler', None)
+    if (scheduler is not None) and (_local.lane == Lane.bulk):
+        scheduler._preempt()
@@ -1,12 +1,12 @@
 import dataclasses
-import datetime
 import io
-import json
-import base64
-
-from camelot.core.qt import QtCore, QtGui
-from enum import Enum
+import typing
 
+# DataclassEncoder and json_encoder are imported for backward compatibility
+from .codec import (
+    DataclassEncoder, get_encoder_hook, get_json_codec, iter_frames,
+    json_encoder, register_encoder_hook,
+)
 from .utils import ugettext_lazy
 
 
@@ -16,20 +16,44 @@ class Serializable(object):
     state to a stream.
     """
 
-    def write_object(self, stream):
+    # no instance dictionary is needed by this interface, to allow
+    # subclasses to use slots.
+    __slots__ = ()
+
+    def write_object(self, stream, codec=None):
         """
         Write the state of the object to a binary stream
+
+        :param codec: the :class:`camelot.core.codec.AbstractCodec` to use,
+            `None` for the json codec
         """
         raise NotImplementedError()
 
-    def read_object(self, stream):
+    def read_object(self, stream, codec=None):
         """
         Read the state of the object from a binary stream
+
+        :param codec: the :class:`camelot.core.codec.AbstractCodec` to use,
+            `None` for the json codec
         """
-        state = json.load(stream)
+        state = (codec or get_json_codec()).decode(stream.read())
         self.__dict__.update(state)
 
-    def _to_bytes(self):
+    def iter_frames(self, frame_size, codec=None):
+        """
+        Serialize the state of the object in frames, to avoid building the
+        complete serialized state in memory.  The default implementation
+        serializes the complete state and splits it afterwards.
+
+        :param frame_size: the maximum length of a frame
+        :param codec: the :class:`camelot.core.codec.AbstractCodec` to use,
+            `None` for the json codec
+        :return: a generator of `bytes` frames, the concatenation of the
+            frames is the serialized object.
+        """
+        return iter_frames([self._to_bytes(codec)], frame_size)
+
+    def _to_bytes(self, codec=None):
         """
         Helper method to serialize the object to bytes.
 
@@ -37,11 +61,11 @@ class Serializable(object):
         intended for use in production code.
         """
         stream = io.BytesIO()
-        self.write_object(stream)
+        self.write_object(stream, codec)
         return stream.getvalue()
 
     @classmethod
-    def _from_bytes(cls, data):
+    def _from_bytes(cls, data, codec=None):
         """
         Helper method to deserialize an object from bytes.
 
@@ -50,7 +74,7 @@ class Serializable(object):
         """
         stream = io.BytesIO(data)
         obj = cls.__new__(cls)
-        obj.read_object(stream)
+        obj.read_object(stream, codec)
         return obj
 
     def _to_dict(self):
@@ -62,47 +86,119 @@ class Serializable(object):
         The purpose of this method is to make unittesting easier, it is not
         intended for use in production code.
         """
-        return json.loads(self._to_bytes())
+        return get_json_codec().decode(self._to_bytes())
         
-class DataclassEncoder(json.JSONEncoder):
-
-    def default(self, obj):
-        if isinstance(obj, ugettext_lazy):
-            return str(obj)
-        if isinstance(obj, QtGui.QKeySequence):
-            return obj.toString()
-        if isinstance(obj, QtGui.QKeySequence.StandardKey):
-            return QtGui.QKeySequence(obj).toString()
-        if isinstance(obj, Enum):
-            return obj.value
-        if isinstance(obj, QtCore.QJsonValue):
-            return obj.toVariant()
-        if isinstance(obj, QtGui.QImage):
-            byte_array = QtCore.QByteArray()
-            buffer = QtCore.QBuffer(byte_array)
-            buffer.open(QtCore.QIODevice.OpenModeFlag.WriteOnly)
-            obj.save(buffer, "PNG");
-            return base64.b64encode(byte_array).decode()
-         # FIXME: Remove this when all classes are serializable.
-         #        Currently needed to serialize some fields
-         #        (e.g. RouteWithRenderHint) from SetColumns._to_dict().
-        if isinstance(obj, DataclassSerializable):
-            return obj.asdict(obj)
-        if isinstance(obj, (datetime.date, datetime.datetime)):
-            raise TypeError("{} {} can not be serialized.".format(type(obj), obj))
-        return json.JSONEncoder.default(self, obj)
-
-
-json_encoder = DataclassEncoder()
+# Types of which the values are passed as is to the encoder, without the
+# need to inspect them.
+_atomic_types = frozenset((str, int, float, bool, type(None)))
+
+def _is_leaf_type(hint):
+    """
+    :return: `True` if the values of a field with this type hint never need
+        conversion before being handed to the encoder.
+    """
+    if isinstance(hint, type):
+        return (hint in _atomic_types) or issubclass(hint, ugettext_lazy)
+    if typing.get_origin(hint) is typing.Union:
+        return all(_is_leaf_type(arg) for arg in typing.get_args(hint))
+    return False
+
+def _asdict_value(obj):
+    """
+    Convert a value for serialization, recursing into dataclasses and
+    containers.
+    """
+    cls = type(obj)
+    if cls in _atomic_types:
+        return obj
+    if hasattr(cls, '__dataclass_fields__'):
+        return cls.serialize_fields(obj)
+    elif isinstance(obj, (list, tuple)):
+        return cls(_asdict_value(v) for v in obj)
+    elif isinstance(obj, dict):
+        return cls((_asdict_value(k), _asdict_value(v)) for k, v in obj.items())
+    # convert the other objects with the encoder hooks before encoding, as
+    # some codecs encode enums or dates natively instead of calling the hooks
+    hook = get_encoder_hook(cls)
+    if hook is not None:
+        return _asdict_value(hook(obj))
+    return obj
+
+class DataclassSerializer(object):
+    """
+    Serialization plan for a dataclass type.  The plan consists of the names
+    of the fields of the dataclass and the converter to apply to the value of
+    each field.  Fields of which the type hint guarantees that no conversion
+    is needed have no converter.
+
+    Use :func:`dataclass_serializer` to get the cached serializer of a type,
+    instead of constructing a new one.
+
+    :param dataclass_type: the dataclass for which to build the plan
+    """
+
+    __slots__ = ('dataclass_type', 'plan')
+
+    def __init__(self, dataclass_type):
+        try:
+            hints = typing.get_type_hints(dataclass_type)
+        except Exception:
+            # unresolvable annotations, convert each of these fields
+            hints = {}
+        self.dataclass_type = dataclass_type
+        self.plan = tuple(
+            (f.name, None if _is_leaf_type(hints.get(f.name)) else _asdict_value)
+            for f in dataclasses.fields(dataclass_type)
+        )
+
+    def __call__(self, obj):
+        """
+        :return: a dictionary with the name and the converted value of each
+            field of obj
+        """
+        result = {}
+        for name, converter in self.plan:
+            value = getattr(obj, name)
+            result[name] = value if converter is None else converter(value)
+        return result
+
+_dataclass_serializers = dict()
+
+def dataclass_serializer(dataclass_type):
+    """
+    :return: the :class:`DataclassSerializer` for a dataclass type, the
+        serializer is generated the first time it is requested for the type.
+    """
+    serializer = _dataclass_serializers.get(dataclass_type)
+    if serializer is None:
+        serializer = DataclassSerializer(dataclass_type)
+        _dataclass_serializers[dataclass_type] = serializer
+    return serializer
 
 class DataclassSerializable(Serializable):
     """
-    Use the dataclass info to serialize the object
+    Use the dataclass info to serialize the object.
+
+    Subclasses that are instantiated in large numbers can be declared with
+    `@dataclass(slots=True)` to avoid an instance dictionary.
     """
 
-    def write_object(self, stream):
-        for chunk in json_encoder.iterencode(self.asdict(self)):
-            stream.write(chunk.encode())
+    __slots__ = ()
+
+    def write_object(self, stream, codec=None):
+        stream.write((codec or get_json_codec()).encode(type(self).serialize_fields(self)))
+
+    def iter_frames(self, frame_size, codec=None):
+        """
+        Encode the object in frames of at most frame_size bytes.  Only the
+        encoded bytes are produced incrementally, the fields of the object
+        are converted by :meth:`serialize_fields` before encoding starts, so
+        the converted tree of the object is held in memory completely.
+
+        :return: a generator of `bytes` frames
+        """
+        codec = codec or get_json_codec()
+        return iter_frames(codec.iterencode(type(self).serialize_fields(self)), frame_size)
     
     @classmethod
     def asdict(cls, obj):
@@ -116,28 +212,21 @@ class DataclassSerializable(Serializable):
     
     @classmethod
     def _asdict_inner(cls, obj):
-        if dataclasses._is_dataclass_instance(obj):
-            return type(obj).serialize_fields(obj)
-        elif isinstance(obj, (list, tuple)):
-            return type(obj)(cls._asdict_inner(v) for v in obj)
-        elif isinstance(obj, dict):
-            return type(obj)((cls._asdict_inner(k), cls._asdict_inner(v))
-                              for k, v in obj.items())
-        else:
-            # we assube obj will be handled by DataclassEncoder.default
-            return obj
+        return _asdict_value(obj)
     
     @classmethod
     def serialize_fields(cls, obj):
         """
         Serialize the given dataclass object's fields.
         By default this will return a dictionary with each field turned into a key-value pair of its name and its value.
+        The conversion of the fields is done by the cached :class:`DataclassSerializer` of the object's type.
         """
-        result = []
-        for f in dataclasses.fields(obj):
-            value = cls._asdict_inner(getattr(obj, f.name))
-            result.append((f.name, value))
-        return dict(result)
+        return dataclass_serializer(type(obj))(obj)
+
+# FIXME: Remove this when all classes are serializable.
+#        Currently needed to serialize some fields
+#        (e.g. RouteWithRenderHint) from SetColumns._to_dict().
+register_encoder_hook(DataclassSerializable, lambda obj: obj.asdict(obj))
 
 class MetaNamedDataclassSerializable(type):
 
@@ -167,4 +256,15 @@ class NamedDataclassSerializable(DataclassSerializable, metaclass=MetaNamedDatac
     
     @classmethod
     def serialize_fields(cls, obj): 
-        return type(obj).__name__, super(NamedDataclassSerializable, cls).serialize_fields(obj)
+        return type(obj).__name__, dataclass_serializer(type(obj))(obj)
+
+__all__ = [
+    DataclassEncoder.__name__,
+    DataclassSerializable.__name__,
+    DataclassSerializer.__name__,
+    MetaNamedDataclassSerializable.__name__,
+    NamedDataclassSerializable.__name__,
+    Serializable.__name__,
+    dataclass_serializer.__name__,
+    'json_encoder',
+]
@@ -50,7 +50,8 @@ from .select_file import SelectFile, SelectDirectory, SaveFile
 from .select_object import SelectObjects, SelectObject
 from .update_progress import UpdateProgress, PushProgressLevel, PopProgressLevel, SetProgressAnimate
 from .crud import (
-    SetColumns, Completion, CompletionValue, Created, RowCount, Update, ChangeSelection
+    SetColumns, Completion, CompletionValue, Created, RowCount, Update, ChangeSelection,
+    CompactCreated, CompactUpdate, ColumnarCreated, ColumnarUpdate
 )
 
 __all__ = [
@@ -60,6 +61,10 @@ __all__ = [
     ChangeSelection.__name__,
     ClearSelection.__name__,
     ClientDirectoryInfo.__name__,
+    ColumnarCreated.__name__,
+    ColumnarUpdate.__name__,
+    CompactCreated.__name__,
+    CompactUpdate.__name__,
     SetSelection.__name__,
     CloseMenu.__name__,
     CloseView.__name__,
@@ -36,6 +36,7 @@ from ...admin.action.application_action import model_context_naming, model_conte
 from ...admin.admin_route import AdminRoute, Route
 from ...admin.menu import MenuItem
 from ...core.naming import initial_naming_context
+from ...core.profiler import model_profiler
 from ...core.serializable import DataclassSerializable
 
 LOGGER = logging.getLogger(__name__)
@@ -83,7 +84,8 @@ class MainWindow(ActionStep, DataclassSerializable):
     model_context_name: Route = field(default_factory=list)
 
     def __post_init__(self, model_context):
-        self.model_context_name = model_context_naming.bind(str(next(model_context_counter)), model_context)
+        # bound immutable to prevent its eviction, it is used as long as the application runs
+        self.model_context_name = model_context_naming.bind(str(next(model_context_counter)), model_context, immutable=True)
 
 
 @dataclass
@@ -106,7 +108,8 @@ class NavigationPanel(ActionStep, DataclassSerializable):
 
     # noinspection PyDataclass
     def __post_init__(self, model_context):
-        self.model_context_name = model_context_naming.bind(str(next(model_context_counter)), model_context)
+        # bound immutable to prevent its eviction, it is used as long as the application runs
+        self.model_context_name = model_context_naming.bind(str(next(model_context_counter)), model_context, immutable=True)
         self._add_action_states(model_context, self.menu.items, self.action_states)
 
     @classmethod
@@ -158,7 +161,8 @@ class MainMenu(ActionStep, DataclassSerializable):
     model_context: InitVar(ModelContext) = None
 
     def __post_init__(self, model_context):
-        self.model_context_name = model_context_naming.bind(str(next(model_context_counter)), model_context)
+        # bound immutable to prevent its eviction, it is used as long as the application runs
+        self.model_context_name = model_context_naming.bind(str(next(model_context_counter)), model_context, immutable=True)
         self._add_action_states(model_context, self.menu.items, self.action_states)
 
     @classmethod
@@ -220,11 +224,29 @@ class UpdateActionsState(ActionStep, DataclassSerializable):
 
 @dataclass
 class StartProfiler(ActionStep, DataclassSerializable):
-    """Start profiling of the gui
+    """Start profiling of the gui, and of the requests handled by the model
+    with the :data:`camelot.core.profiler.model_profiler`.  The model
+    profiler is started when the step is yielded by an action.
     """
 
+    def profile_model(self):
+        """
+        Start the model profiler, called when the step is yielded
+        """
+        model_profiler.start()
+
 
 @dataclass
 class StopProfiler(ActionStep, DataclassSerializable):
-    """Start profiling of the gui
+    """Stop profiling of the gui, and write the samples of the model profiler
+    to a folded stacks file in the `CAMELOT_PROFILE_DIR` directory.  The
+    samples are written when the step is yielded by an action.
     """
+
+    def profile_model(self):
+        """
+        Stop the model profiler and write its samples, called when the step
+        is yielded
+        """
+        if model_profiler.running:
+            model_profiler.dump()
@@ -8,7 +8,7 @@ from camelot.admin.admin_route import Route
 from camelot.admin.action.base import ActionStep, State
 from camelot.admin.icon import CompletionValue
 from camelot.core.serializable import DataclassSerializable
-from camelot.view.crud_action import CrudActions, DataUpdate
+from camelot.view.crud_action import ColumnarDataUpdate, CompactDataUpdate, CrudActions, DataUpdate
 from camelot.view.utils import get_settings_group
 
 from dataclasses import dataclass, field, InitVar
@@ -137,6 +137,42 @@ class Update(ActionStep, DataUpdate):
 
     blocking: ClassVar[bool] = False
 
+@dataclass
+class CompactCreated(ActionStep, CompactDataUpdate):
+    """
+    :class:`Created` in the compact format of
+    :class:`camelot.view.crud_action.CompactDataUpdate`
+    """
+
+    blocking: ClassVar[bool] = False
+
+@dataclass
+class CompactUpdate(ActionStep, CompactDataUpdate):
+    """
+    :class:`Update` in the compact format of
+    :class:`camelot.view.crud_action.CompactDataUpdate`
+    """
+
+    blocking: ClassVar[bool] = False
+
+@dataclass
+class ColumnarCreated(ActionStep, ColumnarDataUpdate):
+    """
+    :class:`Created` in the columnar format of
+    :class:`camelot.view.crud_action.ColumnarDataUpdate`
+    """
+
+    blocking: ClassVar[bool] = False
+
+@dataclass
+class ColumnarUpdate(ActionStep, ColumnarDataUpdate):
+    """
+    :class:`Update` in the columnar format of
+    :class:`camelot.view.crud_action.ColumnarDataUpdate`
+    """
+
+    blocking: ClassVar[bool] = False
+
 @dataclass
 class ChangeSelection(ActionStep, DataclassSerializable):
 
@@ -96,8 +96,8 @@ class AbstractCrudView(ActionStep, DataclassSerializable):
 
     @staticmethod
     def _add_action_states(model_context, actions, action_states):
-        for action_route in actions:
-            action = initial_naming_context.resolve(action_route.route)
+        routed_actions = initial_naming_context.resolve_many([action_route.route for action_route in actions])
+        for action_route, action in zip(actions, routed_actions):
             state = action.get_state(model_context)
             action_states.append((action_route.route, state))
 
@@ -10,9 +10,9 @@ from camelot.core.qt import Qt, QtGui
 from camelot.core.serializable import DataclassSerializable
 
 from dataclasses import dataclass, field, InitVar
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class DataCell(DataclassSerializable):
 
     row: int = -1
@@ -30,7 +30,7 @@ class DataCell(DataclassSerializable):
         return item
 
 
-@dataclass
+@dataclass(slots=True)
 class DataRowHeader(DataclassSerializable):
 
     row: int = -1
@@ -58,6 +58,271 @@ class DataUpdate(DataclassSerializable):
             self.cells.extend(items)
 
 
+@dataclass
+class ColumnBaseline(DataclassSerializable):
+    """
+    The flags and roles shared by the cells of a column in a
+    :class:`CompactDataUpdate`.  The roles are those present in every cell of
+    the column, with their value in the first cell of the column.
+    """
+
+    column: int
+    flags: int
+    roles: Dict[int, Any] = field(default_factory=dict)
+
+
+@dataclass
+class CompactDataRow(DataclassSerializable):
+    """
+    The header and the changed cells of a row in a :class:`CompactDataUpdate`.
+
+    .. attribute:: cells
+
+        A list with for each cell `[column, roles]`, or `[column, roles, flags]`
+        when the flags differ from those of the column baseline.  The roles
+        only contain the roles that differ from the column baseline.
+    """
+
+    header: DataRowHeader
+    cells: List[list] = field(default_factory=list)
+
+
+def _same_value(value, baseline_value):
+    # compare types as well, to distinguish eg. 1 from True
+    return (type(value) is type(baseline_value)) and (value == baseline_value)
+
+
+@dataclass
+class CompactDataUpdate(DataclassSerializable):
+    """
+    Compact alternative to :class:`DataUpdate`, constructed from the same
+    changed ranges.  Cells are grouped by row and only contain the flags
+    and roles that differ from the baseline of their column.
+
+    The roles of a cell are the roles of its column baseline, updated with
+    the roles of the cell itself.
+    """
+
+    changed_ranges: InitVar
+
+    baselines: List[ColumnBaseline] = field(default_factory=list)
+    rows: List[CompactDataRow] = field(default_factory=list)
+
+    def __post_init__(self, changed_ranges):
+        changed_ranges = list(changed_ranges)
+        baselines = dict()
+        for row, header_item, items in changed_ranges:
+            for cell in items:
+                baseline = baselines.get(cell.column)
+                if baseline is None:
+                    baselines[cell.column] = ColumnBaseline(cell.column, cell.flags, dict(cell.roles))
+                    continue
+                for role in [role for role in baseline.roles if role not in cell.roles]:
+                    del baseline.roles[role]
+        self.baselines.extend(baselines.values())
+        for row, header_item, items in changed_ranges:
+            compact_row = CompactDataRow(header_item)
+            for cell in items:
+                baseline = baselines[cell.column]
+                baseline_roles = baseline.roles
+                roles = {
+                    role: value for role, value in cell.roles.items() if (
+                        role not in baseline_roles
+                    ) or not _same_value(value, baseline_roles[role])
+                }
+                if _same_value(cell.flags, baseline.flags):
+                    compact_row.cells.append([cell.column, roles])
+                else:
+                    compact_row.cells.append([cell.column, roles, cell.flags])
+            self.rows.append(compact_row)
+
+    def get_cells(self) -> List[Tuple[DataRowHeader, List[DataCell]]]:
+        """
+        Expand the compact update, use this method to verify its content in
+        unit tests.
+
+        :return: a list with for each row its header and its cells
+        """
+        baselines = {baseline.column: baseline for baseline in self.baselines}
+        expanded = []
+        for compact_row in self.rows:
+            cells = []
+            for column, roles, *flags in compact_row.cells:
+                baseline = baselines[column]
+                cells.append(DataCell(
+                    row=compact_row.header.row,
+                    column=column,
+                    flags=flags[0] if flags else baseline.flags,
+                    roles={**baseline.roles, **roles},
+                ))
+            expanded.append((compact_row.header, cells))
+        return expanded
+
+
+# marks a role that was not set for a row in a ColumnarRows container
+_unset = object()
+
+class ColumnarRows(object):
+    """
+    Struct of arrays container for the data of a range of rows, as an
+    alternative to a :class:`DataCell` with its own roles dictionary for
+    each cell.  For each column it keeps a list with the flags of each row,
+    and for each role a list with the value of each row.
+
+    Rows are added with :meth:`append_row`, after which the flags and roles
+    of the cells of that row are set.  A cell is part of the update once its
+    flags are set, cells of which the flags are not set for a row have
+    `None` as flags and are not changed by the update.  Roles can be set on
+    cells that are part of the update, the roles that are not set are not
+    changed either.
+
+    :param columns: the columns for which the container holds data
+    """
+
+    __slots__ = ('columns', 'rows', 'header_items', 'flags', 'roles', '_column_index')
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.rows = []
+        self.header_items = []
+        self.flags = [[] for _column in self.columns]
+        self.roles = [dict() for _column in self.columns]
+        self._column_index = {column: i for i, column in enumerate(self.columns)}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def append_row(self, row: int, header_item: DataRowHeader):
+        """
+        Add a row to the container, subsequent calls to :meth:`set_flags` and
+        :meth:`set_data` apply to this row.
+        """
+        self.rows.append(row)
+        self.header_items.append(header_item)
+        for column_flags in self.flags:
+            column_flags.append(None)
+        for column_roles in self.roles:
+            for values in column_roles.values():
+                values.append(_unset)
+
+    def set_flags(self, column: int, flags):
+        """Set the flags of a column in the last added row"""
+        self.flags[self._column_index[column]][-1] = flags
+
+    def set_data(self, column: int, role: int, value):
+        """Set the value of a role of a column in the last added row"""
+        column_roles = self.roles[self._column_index[column]]
+        values = column_roles.get(role)
+        if values is None:
+            values = column_roles[role] = [_unset] * len(self.rows)
+        values[-1] = value
+
+    def add_cell(self, cell: DataCell):
+        """Copy the flags and roles of a cell to the last added row"""
+        self.set_flags(cell.column, cell.flags)
+        for role, value in cell.roles.items():
+            self.set_data(cell.column, role, value)
+
+    @classmethod
+    def from_changed_ranges(cls, changed_ranges, columns):
+        """
+        Construct the container from the changed ranges used to construct
+        a :class:`DataUpdate`
+        """
+        columnar_rows = cls(columns)
+        for row, header_item, items in changed_ranges:
+            columnar_rows.append_row(row, header_item)
+            for cell in items:
+                columnar_rows.add_cell(cell)
+        return columnar_rows
+
+
+@dataclass
+class ColumnarDataUpdate(DataclassSerializable):
+    """
+    Alternative to :class:`DataUpdate` constructed from the lists of a
+    :class:`ColumnarRows` container, without creating an object per cell.
+    The lists are copied, so the container can be reused by its producer
+    once the update is constructed.
+
+    .. attribute:: flags
+
+        for each column, the list of flags of each row, `None` for the
+        cells that are not part of the update
+
+    .. attribute:: roles
+
+        for each column, a dictionary mapping each role to the list of
+        values of each row
+
+    .. attribute:: unset
+
+        for each column, a dictionary mapping a role to the indexes in
+        :attr:`rows` of the cells that are part of the update, but of which
+        the role was not set.  Roles set in all cells of the column are
+        absent.  The values of roles that were not set are `None` in
+        :attr:`roles`.
+    """
+
+    columnar_rows: InitVar[ColumnarRows]
+
+    rows: List[int] = field(init=False)
+    header_items: List[DataRowHeader] = field(init=False)
+    columns: List[int] = field(init=False)
+    flags: List[List[Optional[int]]] = field(init=False)
+    roles: List[Dict[int, List[Any]]] = field(init=False)
+    unset: List[Dict[int, List[int]]] = field(init=False)
+
+    def __post_init__(self, columnar_rows):
+        self.rows = list(columnar_rows.rows)
+        self.header_items = list(columnar_rows.header_items)
+        self.columns = list(columnar_rows.columns)
+        self.flags = [list(column_flags) for column_flags in columnar_rows.flags]
+        self.roles = []
+        self.unset = []
+        for column_flags, column_roles in zip(self.flags, columnar_rows.roles):
+            roles, column_unset = dict(), dict()
+            for role, values in column_roles.items():
+                if _unset not in values:
+                    roles[role] = list(values)
+                    continue
+                roles[role] = values = list(values)
+                for i, value in enumerate(values):
+                    if value is _unset:
+                        values[i] = None
+                        if column_flags[i] is not None:
+                            column_unset.setdefault(role, []).append(i)
+            self.roles.append(roles)
+            self.unset.append(column_unset)
+
+    def get_cells(self) -> List[Tuple[DataRowHeader, List[DataCell]]]:
+        """
+        Expand the update into cells, use this method to verify its content
+        in unit tests.
+
+        :return: a list with for each row its header and the cells that are
+            part of the update, with the roles that were set
+        """
+        expanded = []
+        for i, (row, header_item) in enumerate(zip(self.rows, self.header_items)):
+            cells = []
+            for column, column_flags, column_roles, column_unset in zip(
+                self.columns, self.flags, self.roles, self.unset
+                ):
+                if column_flags[i] is None:
+                    continue
+                cells.append(DataCell(
+                    row=row, column=column, flags=column_flags[i],
+                    roles={
+                        role: values[i] for role, values in column_roles.items() if (
+                            i not in column_unset.get(role, ())
+                        )
+                    },
+                ))
+            expanded.append((header_item, cells))
+        return expanded
+
+
 invalid_item = DataCell()
 invalid_item.flags = Qt.ItemFlag.NoItemFlags
 invalid_item.roles[Qt.ItemDataRole.EditRole] = None
@@ -1,12 +1,18 @@
 from dataclasses import dataclass
-import json
 import logging
+import threading
+import time
 import typing
 
+from ..core.codec import decode_message, get_codec
 from ..core.exception import CancelRequest, GuiException
+from ..core.metrics import metrics
+from ..core.profiler import model_profiler
 from ..core.naming import (
-    CompositeName, NamingException, NameNotFoundException, initial_naming_context
+    CompositeName, EvictedBindingException, NamingException, NameNotFoundException,
+    initial_naming_context
 )
+from ..core.scheduler import Lane, preemption_point
 from ..core.serializable import NamedDataclassSerializable, Serializable
 
 LOGGER = logging.getLogger('camelot.view.requests')
@@ -16,27 +22,227 @@ class ModelRun(object):
     Server side information of an ongoing action run
     """
 
-    def __init__(self, gui_run_name: CompositeName, generator, model_context):
+    def __init__(self, gui_run_name: CompositeName, generator, model_context, strand=None, lane=Lane.bulk, action_name=None):
         self.gui_run_name = gui_run_name
         self.generator = generator
         self.cancel = False
         self.last_step = None
         self.model_context = model_context
+        self.strand = strand
+        self.lane = lane
+        self.action_name = action_name
+        # held while the generator is iterated
+        self.lock = threading.RLock()
 
 model_run_names = initial_naming_context.bind_new_context('model_run')
 
+
+class CancelRegistry(object):
+    """
+    The names of the runs for which a cancel was requested, and that did not
+    yet receive a :class:`camelot.core.exception.CancelRequest`.  Requests can
+    be registered and consumed from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._run_names = set()
+
+    def request(self, run_name: CompositeName):
+        with self._lock:
+            self._run_names.add(run_name)
+
+    def pop(self, run_name: CompositeName) -> bool:
+        """
+        Consume the cancel request for a run
+
+        :return: `True` if a cancel was requested for the run
+        """
+        with self._lock:
+            if run_name in self._run_names:
+                self._run_names.remove(run_name)
+                return True
+            return False
+
+cancel_requests = CancelRegistry()
+
+# the lanes in which runs of actions are scheduled, by prefix of the action
+# route, runs of other actions are scheduled in the bulk lane
+action_lanes = {
+    ('crud_action',): Lane.interactive,
+}
+
+def get_action_lane(action_name: CompositeName) -> Lane:
+    """
+    :return: the :class:`camelot.core.scheduler.Lane` registered in
+        `action_lanes` for the longest prefix of the action name
+    """
+    for i in range(len(action_name), 0, -1):
+        lane = action_lanes.get(action_name[:i])
+        if lane is not None:
+            return lane
+    return Lane.bulk
+
+class ResponseCollector(object):
+    """
+    Response handler that collects the responses instead of sending them,
+    until they are flushed.
+
+    :param response_handler: the response handler that will eventually send
+        the collected responses
+    """
+
+    def __init__(self, response_handler):
+        self.response_handler = response_handler
+        self.responses = []
+
+    @property
+    def wire_format(self):
+        return getattr(self.response_handler, 'wire_format', 'json')
+
+    @wire_format.setter
+    def wire_format(self, wire_format):
+        # responses collected before the change should be sent in the
+        # previous format
+        self.flush()
+        self.response_handler.wire_format = wire_format
+
+    @property
+    def frame_size(self):
+        return getattr(self.response_handler, 'frame_size', None)
+
+    @frame_size.setter
+    def frame_size(self, frame_size):
+        self.response_handler.frame_size = frame_size
+
+    def send_response(self, response):
+        self.responses.append(response)
+
+    def flush(self):
+        """
+        Send the collected responses as a single message, a
+        :class:`camelot.view.responses.BatchResponse` in case multiple
+        responses were collected.
+        """
+        from .responses import BatchResponse
+        responses, self.responses = self.responses, []
+        if len(responses) == 1:
+            self.response_handler.send_response(responses[0])
+        elif len(responses) > 1:
+            self.response_handler.send_response(BatchResponse(responses=responses))
+
+    def has_cancel_request(self, run_name):
+        return self.response_handler.has_cancel_request(run_name)
+
 class AbstractRequest(NamedDataclassSerializable):
     """
     Serialiazable Requests the UI can send to the model
     """
 
     @classmethod
-    def handle_request(cls, request, response_handler, cancel_handler):
-        request_type_name, request_data = json.loads(request)
+    def handle_request(cls, request, response_handler, cancel_handler, codec=None):
+        """
+        Decode and execute a serialized request.
+
+        :param codec: the :class:`camelot.core.codec.AbstractCodec` of the
+            connection, `None` for the json codec.  Json requests are always
+            accepted.
+        """
+        request_type_name, request_data = cls.decode_request(request, codec)
+        cls.dispatch_request(
+            request_type_name, request_data, response_handler, cancel_handler
+        )
+
+    @classmethod
+    def decode_request(cls, request, codec=None):
+        """
+        Decode a serialized request.
+
+        :return: a tuple with the name of the request class and the
+            serialized fields of the request
+        """
+        started = time.perf_counter()
+        request_type_name, request_data = decode_message(request, codec)
+        if metrics.exporters:
+            request_type = NamedDataclassSerializable.get_cls_by_name(
+                request_type_name
+            )
+            labels = (request_type_name, request_type.get_route(request_data))
+            metrics.observe(
+                'camelot_request_deserialize_seconds',
+                time.perf_counter() - started, labels
+            )
+            metrics.observe('camelot_request_bytes', len(request), labels)
+        return request_type_name, request_data
+
+    @classmethod
+    def dispatch_request(cls, request_type_name, request_data, response_handler, cancel_handler):
+        """
+        Execute a decoded request.
+
+        :param request_type_name: the name of the request class
+        :param request_data: the serialized fields of the request
+        """
         request_type = NamedDataclassSerializable.get_cls_by_name(
             request_type_name
         )
-        request_type.execute(request_data, response_handler, cancel_handler)
+        if not (metrics.exporters or model_profiler.running):
+            request_type.execute(request_data, response_handler, cancel_handler)
+            return
+        route = request_type.get_route(request_data)
+        with metrics.labels(request_type_name, route), model_profiler.request(request_type_name, route):
+            request_type.execute(request_data, response_handler, cancel_handler)
+
+    @classmethod
+    def get_strand(cls, request_data):
+        """
+        Determine how the request can be scheduled when the connection
+        executes requests concurrently, see :class:`camelot.core.scheduler.Scheduler`.
+
+        :return: `None` if the request should be executed immediately, in the
+            thread that received it.  Otherwise a key, requests with the same
+            key are executed in order and one at a time.  By default requests
+            for an action run use the strand of their run.
+        """
+        return getattr(cls._get_run(request_data), 'strand', None)
+
+    @classmethod
+    def split(cls, request_data):
+        """
+        Split the request in parts that are scheduled independently, each on
+        its own strand.
+
+        :return: a list with the serialized fields of each part, by default
+            the request is not split.
+        """
+        return [request_data]
+
+    @classmethod
+    def get_lane(cls, request_data) -> Lane:
+        """
+        :return: the :class:`camelot.core.scheduler.Lane` in which the request
+            is scheduled when it has a strand.  By default requests for an
+            action run use the lane of their run.
+        """
+        return getattr(cls._get_run(request_data), 'lane', Lane.interactive)
+
+    @classmethod
+    def get_route(cls, request_data):
+        """
+        :return: the route of the action the request concerns, or `None`.
+            By default requests for an action run use the route of the
+            action of the run.
+        """
+        return getattr(cls._get_run(request_data), 'action_name', None)
+
+    @classmethod
+    def _get_run(cls, request_data):
+        if 'run_name' not in request_data:
+            return None
+        try:
+            return initial_naming_context.resolve(tuple(request_data['run_name']))
+        except (NamingException, NameNotFoundException):
+            return None
 
     @classmethod
     def execute(cls, request_data, response_handler, cancel_handler):
@@ -62,7 +268,12 @@ class AbstractRequest(NamedDataclassSerializable):
         # As the unbind might fail, first send the ActionStopped response
         # so the client can let go of the run
         if run_name != ('constant', 'null'):
-            initial_naming_context.unbind(run_name)
+            try:
+                initial_naming_context.unbind(run_name)
+            finally:
+                # a cancel registered before the unbind is dropped here,
+                # one registered after it is dropped by the CancelAction
+                cancel_requests.pop(run_name)
 
     @classmethod
     def _send_stop_message(cls, run_name, gui_run_name, response_handler, e):
@@ -89,6 +300,7 @@ class AbstractRequest(NamedDataclassSerializable):
         :param *args: the arguments to use when calling the generator method.
         """
         from ..admin.action import ActionStep
+        from .action_steps.application import StartProfiler, StopProfiler
         from .responses import ActionStepped
         try:
             run_name = tuple(request_data['run_name'])
@@ -100,42 +312,65 @@ class AbstractRequest(NamedDataclassSerializable):
             LOGGER.error('Request contains no run {}'.format(request_data))
             return
         gui_run_name = run.gui_run_name
-        try:
-            result = cls._next(run, request_data)
-            while True:
-                if isinstance(result, ActionStep):
-                    run.last_step = result
-                    response_handler.send_response(ActionStepped(
-                        run_name=run_name, gui_run_name=gui_run_name,
-                        step=(type(result).__name__, result),
-                        blocking=result.blocking,
-                    ))
-                    if result.blocking:
-                        # this step is blocking, interrupt the loop
-                        return
-                #
-                # Cancel requests can arrive asynchronously through non 
-                # blocking ActionSteps such as UpdateProgress
-                #
-                if cancel_handler.has_cancel_request():
-                    LOGGER.debug( 'asynchronous cancel, raise request' )
+        started, preempted, steps = time.perf_counter(), 0, 0
+        with run.lock:
+            try:
+                # a cancel might have been requested while the previous
+                # request for the run was handled
+                if cancel_handler.has_cancel_request(run_name):
                     result = run.generator.throw(CancelRequest())
                 else:
-                    result = next(run.generator)
-        except CancelRequest as e:
-            LOGGER.debug( 'iterator raised cancel request, pass it' )
-            # After the iterator raised a CancelRequest, it will still raise
-            # a StopIteration, so there is no need to stop the action now.
-            # However not doing so results in the progress popup not being
-            # popped in certain cases (eg run forward all schedules -> cancel)
-            cls._stop_action(run_name, gui_run_name, response_handler, e)
-        except StopIteration as e:
-            cls._stop_action(run_name, gui_run_name, response_handler, e)
-        except Exception as e:
-            LOGGER.error('Unhandled exception', exc_info=e)
-            cls._send_stop_message(
-                ('constant', 'null'), gui_run_name, response_handler, e
-            )
+                    result = cls._next(run, request_data)
+                while True:
+                    if isinstance(result, ActionStep):
+                        steps += 1
+                        if isinstance(result, (StartProfiler, StopProfiler)):
+                            result.profile_model()
+                        run.last_step = result
+                        response_handler.send_response(ActionStepped(
+                            run_name=run_name, gui_run_name=gui_run_name,
+                            step=(type(result).__name__, result),
+                            blocking=result.blocking,
+                        ))
+                        if result.blocking:
+                            # this step is blocking, interrupt the loop
+                            return
+                    #
+                    # Cancel requests can arrive asynchronously through non 
+                    # blocking ActionSteps such as UpdateProgress, or through
+                    # a CancelAction handled by another thread
+                    #
+                    if cancel_handler.has_cancel_request(run_name):
+                        LOGGER.debug( 'asynchronous cancel, raise request' )
+                        result = run.generator.throw(CancelRequest())
+                    else:
+                        # between steps, runs in the bulk lane give way to
+                        # interactive requests
+                        preemption_started = time.perf_counter()
+                        preemption_point()
+                        preempted += time.perf_counter() - preemption_started
+                        result = next(run.generator)
+            except CancelRequest as e:
+                LOGGER.debug( 'iterator raised cancel request, pass it' )
+                # After the iterator raised a CancelRequest, it will still raise
+                # a StopIteration, so there is no need to stop the action now.
+                # However not doing so results in the progress popup not being
+                # popped in certain cases (eg run forward all schedules -> cancel)
+                cls._stop_action(run_name, gui_run_name, response_handler, e)
+            except StopIteration as e:
+                cls._stop_action(run_name, gui_run_name, response_handler, e)
+            except Exception as e:
+                LOGGER.error('Unhandled exception', exc_info=e)
+                cls._send_stop_message(
+                    ('constant', 'null'), gui_run_name, response_handler, e
+                )
+            finally:
+                if metrics.exporters:
+                    metrics.observe(
+                        'camelot_request_generator_seconds',
+                        time.perf_counter() - started - preempted
+                    )
+                    metrics.observe('camelot_request_steps', steps)
 
 @dataclass
 class InitiateAction(AbstractRequest):
@@ -148,6 +383,23 @@ class InitiateAction(AbstractRequest):
     model_context: CompositeName
     mode: typing.Union[str, dict, list, int]
 
+    @classmethod
+    def get_strand(cls, request_data):
+        # runs on the same model context are executed in order, runs without
+        # a model context are independent of each other
+        model_context = tuple(request_data['model_context'])
+        if model_context == ('constant', 'null'):
+            return ('gui_run',) + tuple(request_data['gui_run_name'])
+        return ('model_context',) + model_context
+
+    @classmethod
+    def get_lane(cls, request_data):
+        return get_action_lane(tuple(request_data['action_name']))
+
+    @classmethod
+    def get_route(cls, request_data):
+        return tuple(request_data['action_name'])
+
     @classmethod
     def _next(cls, run: ModelRun, request_data):
         # initiate action should implement next to make sure the action
@@ -174,8 +426,10 @@ class InitiateAction(AbstractRequest):
                 LOGGER.error('Could not resolve action from gui_run {}, no binding for name: {}'.format(
                     gui_run_name, e.name
                 ))
+            # the client can not recover from an evicted binding, tell it why
+            exception = e.message_text if isinstance(e, EvictedBindingException) else None
             response_handler.send_response(ActionStopped(
-                run_name=('constant', 'null'), gui_run_name=gui_run_name, exception=None
+                run_name=('constant', 'null'), gui_run_name=gui_run_name, exception=exception
             ))
             return
         generator, exception = None, None
@@ -188,7 +442,11 @@ class InitiateAction(AbstractRequest):
                 run_name=('constant', 'null'), gui_run_name=gui_run_name, exception=exception
             ))
             return
-        run = ModelRun(gui_run_name, generator, model_context)
+        run = ModelRun(
+            gui_run_name, generator, model_context,
+            cls.get_strand(request_data), cls.get_lane(request_data),
+            cls.get_route(request_data),
+        )
         run_name = model_run_names.bind(str(id(run)), run)
         response_handler.send_response(ActionStepped(
             run_name=run_name, gui_run_name=gui_run_name, blocking=False,
@@ -239,9 +497,48 @@ class CancelAction(AbstractRequest):
     Request an action run to be canceled, even if the action is not waiting
     for a response. The running action is uniquely identified on the server side
     by its run_name.
+
+    The cancel is registered in `cancel_requests` when the request is
+    received.  When the run is being iterated in another thread, the
+    :class:`camelot.core.exception.CancelRequest` is thrown in the generator
+    at its next step, otherwise it is thrown immediately.  When the run
+    stopped in the meantime, the cancel is dropped again, to not cancel a
+    later run with the same name.
     """
     run_name: CompositeName
 
+    @classmethod
+    def get_strand(cls, request_data):
+        # not queued behind the run it cancels
+        return None
+
+    @classmethod
+    def execute(cls, request_data, response_handler, cancel_handler):
+        run_name = tuple(request_data['run_name'])
+        run = cls._get_run(request_data)
+        if run is None:
+            LOGGER.debug('Cancel of run {} that is no longer active'.format(run_name))
+            return
+        cancel_requests.request(run_name)
+        # the run is unbound before it drops its cancel requests, so if it
+        # is still bound, it will consume or drop this request
+        if cls._get_run(request_data) is not run:
+            cancel_requests.pop(run_name)
+            LOGGER.debug('Cancel of run {} that stopped'.format(run_name))
+            return
+        if not run.lock.acquire(blocking=False):
+            LOGGER.debug('Cancel of run {} registered'.format(run_name))
+            return
+        try:
+            # the run might have consumed the request before the lock
+            # was acquired
+            if cancel_requests.pop(run_name):
+                cls._iterate_until_blocking(
+                    request_data, response_handler, cancel_handler
+                )
+        finally:
+            run.lock.release()
+
     @classmethod
     def _next(cls, run, request_data):
         return run.generator.throw(CancelRequest())
@@ -262,8 +559,118 @@ class Unbind(AbstractRequest):
 
     @classmethod
     def execute(cls, request_data, response_handler, cancel_handler):
-        for lease in request_data['names']:
-            try:
-                initial_naming_context.unbind(tuple(lease))
-            except NameNotFoundException:
-                LOGGER.warn('received unbind request for non bound lease : {}'.format(lease))
+        leases = [tuple(lease) for lease in request_data['names']]
+        for lease in initial_naming_context.unbind_many(leases):
+            LOGGER.warn('received unbind request for non bound lease : {}'.format(lease))
+
+
+@dataclass
+class SetWireFormat(AbstractRequest):
+    """
+    Request the wire format of the connection to be changed.  The
+    :class:`camelot.view.responses.WireFormatChanged` response is sent in the
+    previous format, all subsequent responses are sent in the format it
+    contains.  When the requested format is not available, the format remains
+    unchanged.
+    """
+
+    wire_format: str
+
+    @classmethod
+    def execute(cls, request_data, response_handler, cancel_handler):
+        from .responses import WireFormatChanged
+        wire_format = request_data['wire_format']
+        previous_format = getattr(response_handler, 'wire_format', 'json')
+        try:
+            get_codec(wire_format)
+        except ValueError:
+            LOGGER.warning('Requested wire format {} is not available'.format(wire_format))
+            wire_format = previous_format
+        response_handler.send_response(WireFormatChanged(wire_format=wire_format))
+        response_handler.wire_format = wire_format
+
+
+@dataclass
+class SetFrameSize(AbstractRequest):
+    """
+    Request responses larger than frame_size to be sent in multiple
+    :class:`camelot.view.responses.ResponseFrame` responses, or each response
+    in a single message if frame_size is `None`.
+    """
+
+    frame_size: typing.Optional[int]
+
+    @classmethod
+    def execute(cls, request_data, response_handler, cancel_handler):
+        frame_size = request_data['frame_size']
+        if (frame_size is not None) and (frame_size <= 0):
+            LOGGER.warning('Invalid frame size {}'.format(frame_size))
+            return
+        response_handler.frame_size = frame_size
+
+
+@dataclass
+class Batch(AbstractRequest):
+    """
+    Multiple requests in a single message.  The requests are executed in
+    order, and the responses they produce are sent together as a single
+    :class:`camelot.view.responses.BatchResponse`.
+
+    When the connection executes requests concurrently, a batch is executed
+    on the strand of its requests.  A batch with requests on different
+    strands is split in a batch per strand, requests without a strand join
+    the batch of the request before them.
+    """
+
+    requests: typing.List[AbstractRequest]
+
+    @classmethod
+    def _get_request_strands(cls, request_data):
+        # yield each batched request with its strand
+        for request_type_name, data in request_data['requests']:
+            request_type = NamedDataclassSerializable.get_cls_by_name(request_type_name)
+            yield request_type_name, data, request_type.get_strand(data)
+
+    @classmethod
+    def get_strand(cls, request_data):
+        strands = set(
+            strand for _name, _data, strand in cls._get_request_strands(request_data)
+        )
+        strands.discard(None)
+        if len(strands) == 1:
+            return strands.pop()
+        return None
+
+    @classmethod
+    def get_lane(cls, request_data):
+        for request_type_name, data in request_data['requests']:
+            request_type = NamedDataclassSerializable.get_cls_by_name(request_type_name)
+            if request_type.get_lane(data) == Lane.interactive:
+                return Lane.interactive
+        return Lane.bulk
+
+    @classmethod
+    def split(cls, request_data):
+        parts = dict()
+        part_strand = None
+        for request_type_name, data, strand in cls._get_request_strands(request_data):
+            if strand is not None:
+                part_strand = strand
+            parts.setdefault(part_strand, []).append([request_type_name, data])
+        if len(parts) <= 1:
+            return [request_data]
+        return [{'requests': requests} for requests in parts.values()]
+
+    @classmethod
+    def execute(cls, request_data, response_handler, cancel_handler):
+        collector = ResponseCollector(response_handler)
+        try:
+            for request_type_name, data in request_data['requests']:
+                try:
+                    cls.dispatch_request(
+                        request_type_name, data, collector, cancel_handler
+                    )
+                except Exception as e:
+                    LOGGER.error('Unhandled exception in batched {} request'.format(request_type_name), exc_info=e)
+        finally:
+            collector.flush()
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 import logging
+import struct
 import typing
 
 from ..core.naming import CompositeName
@@ -36,3 +37,61 @@ class ActionStopped(AbstractResponse):
     run_name: CompositeName
     gui_run_name: CompositeName
     exception: typing.Any
+
+
+@dataclass
+class WireFormatChanged(AbstractResponse):
+    wire_format: str
+
+
+@dataclass
+class ResponseFrame(AbstractResponse):
+    """
+    A frame of a response that is sent in multiple frames.  The
+    concatenation of the data of the frames of a stream is the serialized
+    response.
+
+    Frames are not serialized like the other responses, as that would
+    encode the serialized response a second time.  A frame is sent as a
+    message with :
+
+        * the `marker` byte, encoded messages never start with it, since
+          they are lists
+        * the length of the header, as a 4 byte big endian integer
+        * the header, the list `[stream, index, last]` encoded with the
+          codec of the connection
+        * the data of the frame, as is
+    """
+    stream: int
+    index: int
+    last: bool
+    data: bytes
+
+    marker: typing.ClassVar[bytes] = b'\x00'
+
+    def to_message(self, codec) -> bytes:
+        """
+        :return: the frame as a message for the client
+        """
+        header = codec.encode([self.stream, self.index, self.last])
+        return b''.join((self.marker, struct.pack('>I', len(header)), header, self.data))
+
+    @classmethod
+    def from_message(cls, message, codec):
+        """
+        :param message: a message produced by :meth:`to_message`
+        :return: the frame in the message
+        """
+        header_length, = struct.unpack_from('>I', message, 1)
+        header_end = 5 + header_length
+        stream, index, last = codec.decode(message[5:header_end])
+        return cls(stream=stream, index=index, last=last, data=bytes(message[header_end:]))
+
+
+@dataclass
+class BatchResponse(AbstractResponse):
+    """
+    The responses to the requests of a :class:`camelot.view.requests.Batch`,
+    in the order they were produced.
+    """
+    responses: typing.List[AbstractResponse]
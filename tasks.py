@@ -25,6 +25,18 @@ def test(ctx, tests="test"):
                'XDG_CONFIG_HOME': os.getcwd()}
     )
 
+@task()
+def benchmark(ctx, benchmarks="benchmark"):
+    """
+    Run benchmarks
+    """
+    env_dir = default_test_env
+    ctx.run(
+        '{}/bin/python -m pytest {}'.format(env_dir, benchmarks),
+        env = {'QT_QPA_PLATFORM': 'offscreen',
+               'XDG_CONFIG_HOME': os.getcwd()}
+    )
+
 @task()
 def create_test_environment(ctx):
     """
@@ -36,6 +48,7 @@ def create_test_environment(ctx):
     ctx.run('{}/bin/pip3 install --upgrade pip'.format(env_dir))
     ctx.run('{}/bin/pip3 install nose'.format(env_dir))
     ctx.run('{}/bin/pip3 install pyflakes'.format(env_dir))
+    ctx.run('{}/bin/pip3 install pytest-benchmark'.format(env_dir))
     ctx.run('{}/bin/pip3 install -r requirements.txt'.format(env_dir))
 
 def extract_fontawesome_metadata(original_json, output_json):
@@ -0,0 +1,37 @@
+"""
+Unit tests of camelot, run them with `invoke test`, or with a test runner
+from the root of the repository with `QT_QPA_PLATFORM=offscreen`.
+"""
+
+import dataclasses
+
+from camelot.core.naming import initial_naming_context
+
+
+def unslotted(cls):
+    """
+    :return: a dataclass with the same fields and serialization as cls, but
+        with an instance dictionary
+    """
+    return dataclasses.make_dataclass(
+        'Unslotted' + cls.__name__,
+        [(f.name, f.type, f) for f in dataclasses.fields(cls)],
+        bases=(cls.__mro__[1],),
+    )
+
+
+class NamingContextMixin(object):
+    """
+    Test case mixin binding a new naming context as :attr:`context` before
+    each test, and unbinding it after the test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.context = initial_naming_context.bind_new_context(
+            'test_{}_{}'.format(type(self).__name__, id(self))
+        )
+
+    def tearDown(self):
+        initial_naming_context.unbind_context(self.context._name)
+        super().tearDown()
@@ -0,0 +1,149 @@
+import itertools
+import os
+import tempfile
+import unittest
+
+from camelot.core.backend import PythonConnection
+from camelot.core.codec import (
+    binary_codecs, get_codec, get_json_codec, json_codecs, set_json_codec,
+)
+from camelot.core.metrics import HistogramExporter, metrics
+from camelot.core.recording import Recorder, _iter_responses
+from camelot.view.responses import BatchResponse, Busy, ResponseFrame
+
+
+class MessageSignal(object):
+
+    def __init__(self):
+        self.messages = []
+
+    def emit(self, message):
+        self.messages.append(message)
+
+
+class Connection(object):
+    """
+    The encoding part of a :class:`PythonConnection`, without a client
+    """
+
+    send_response = PythonConnection.send_response
+    _encode_response = PythonConnection._encode_response
+
+    def __init__(self, frame_size=None):
+        self.wire_format = 'json'
+        self.frame_size = frame_size
+        self.recorder = None
+        self.message_ready = MessageSignal()
+        self._stream_counter = itertools.count()
+
+
+class SendResponseCase(unittest.TestCase):
+
+    def setUp(self):
+        self.response = BatchResponse(responses=[Busy(i % 2 == 0) for i in range(1000)])
+        self.exporter = HistogramExporter()
+        metrics.add_exporter(self.exporter)
+
+    def tearDown(self):
+        metrics.remove_exporter(self.exporter)
+
+    def test_single_message(self):
+        connection = Connection()
+        connection.send_response(self.response)
+        self.assertEqual(len(connection.message_ready.messages), 1)
+        self.assertEqual(
+            get_json_codec().decode(connection.message_ready.messages[0]),
+            self.response._to_dict()
+        )
+
+    def test_frame_per_message(self):
+        connection = Connection(frame_size=1024)
+        connection.send_response(self.response)
+        messages = connection.message_ready.messages
+        self.assertGreater(len(messages), 1)
+        for message in messages:
+            self.assertIsInstance(message, bytes)
+        histograms = self.exporter.histograms()
+        response_bytes = histograms[('camelot_response_bytes', ('', None))]
+        self.assertEqual(response_bytes.count, 1)
+        self.assertEqual(response_bytes.sum, sum(len(message) for message in messages))
+        self.assertEqual(
+            histograms[('camelot_response_serialize_seconds', ('', None))].count, 1
+        )
+
+    def test_record_frames(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recording.jsonl')
+            connection = Connection(frame_size=1024)
+            connection.recorder = Recorder(path)
+            connection.send_response(Busy(True))
+            connection.send_response(self.response)
+            connection.recorder.close()
+            self.assertEqual(
+                list(_iter_responses(path)),
+                [Busy(True)._to_dict(), self.response._to_dict()]
+            )
+
+    def test_record_binary_frames(self):
+        for codec_cls in binary_codecs:
+            if not codec_cls.available():
+                continue
+            with self.subTest(codec=codec_cls.name), tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'recording.jsonl')
+                connection = Connection(frame_size=256)
+                connection.wire_format = codec_cls.wire_format
+                connection.recorder = Recorder(path)
+                connection.send_response(Busy(True))
+                connection.send_response(self.response)
+                connection.recorder.close()
+                # the recorded frames are the messages sent to the client
+                with open(path) as stream:
+                    self.assertEqual(
+                        len(stream.readlines()), len(connection.message_ready.messages)
+                    )
+                self.assertEqual(
+                    list(_iter_responses(path)),
+                    [Busy(True)._to_dict(), self.response._to_dict()]
+                )
+
+
+class FrameCase(unittest.TestCase):
+
+    def setUp(self):
+        self.response = BatchResponse(responses=[Busy(i % 2 == 0) for i in range(1000)])
+
+    def tearDown(self):
+        set_json_codec()
+
+    def assert_frames(self, connection):
+        codec = get_codec(connection.wire_format)
+        connection.send_response(self.response)
+        messages = connection.message_ready.messages
+        self.assertGreater(len(messages), 1)
+        frames = [ResponseFrame.from_message(message, codec) for message in messages]
+        self.assertEqual([frame.index for frame in frames], list(range(len(frames))))
+        self.assertEqual([frame.last for frame in frames], [False] * (len(frames) - 1) + [True])
+        for frame in frames[:-1]:
+            self.assertEqual(len(frame.data), connection.frame_size)
+        # the data of the frames is the encoded response, without escaping
+        self.assertEqual(
+            b''.join(frame.data for frame in frames),
+            self.response._to_bytes(codec)
+        )
+
+    def test_json_frames(self):
+        for codec_cls in json_codecs:
+            if not codec_cls.available():
+                continue
+            with self.subTest(codec=codec_cls.name):
+                set_json_codec(codec_cls.name)
+                self.assert_frames(Connection(frame_size=1024))
+
+    def test_binary_frames(self):
+        for codec_cls in binary_codecs:
+            if not codec_cls.available():
+                continue
+            with self.subTest(codec=codec_cls.name):
+                connection = Connection(frame_size=256)
+                connection.wire_format = codec_cls.wire_format
+                self.assert_frames(connection)
@@ -0,0 +1,202 @@
+import dataclasses
+import datetime
+import json
+import typing
+import unittest
+from enum import Enum
+
+from camelot.admin.action.base import MetaActionStep
+from camelot.core import codec
+from camelot.core.item_model import FocusPolicyRole, PreviewRole
+from camelot.core.qt import Qt, QtGui
+from camelot.core.serializable import DataclassSerializable
+from camelot.core.utils import ugettext_lazy
+from camelot.view import action_steps
+from camelot.view.crud_action import DataCell
+from camelot.view.requests import AbstractRequest, SetWireFormat
+
+
+def setUpModule():
+    # standard key sequences are only available in an application
+    global application
+    application = QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+def sample_value(hint, depth=0):
+    """
+    :return: a value of the type described by a type hint, nested
+        dataclasses are sampled up to a limited depth
+    """
+    origin, args = typing.get_origin(hint), typing.get_args(hint)
+    if hint is typing.Any:
+        return {'text': [1, 'text', None, True, 1.5]}
+    if origin is typing.Union:
+        return sample_value([arg for arg in args if arg is not type(None)][0], depth)
+    if origin is list:
+        return [sample_value(args[0], depth) if args else 1] if depth < 3 else []
+    if origin is tuple:
+        return tuple(sample_value(arg, depth) for arg in args if arg is not Ellipsis)
+    if origin is dict:
+        return {sample_value(args[0], depth): sample_value(args[1], depth)}
+    if isinstance(hint, type):
+        if issubclass(hint, Enum):
+            return list(hint)[-1]
+        if dataclasses.is_dataclass(hint):
+            return sample_instance(hint, depth + 1) if depth < 3 else None
+        if issubclass(hint, ugettext_lazy):
+            return ugettext_lazy('text')
+        if hint in (bool, int, float, str):
+            return hint(1)
+    return None
+
+
+def sample_instance(dataclass_type, depth=0):
+    """
+    :return: an instance of a dataclass with a value of the right type for
+        each field, without calling its constructor
+    """
+    try:
+        hints = typing.get_type_hints(dataclass_type)
+    except Exception:
+        hints = {}
+    obj = dataclass_type.__new__(dataclass_type)
+    for field in dataclasses.fields(dataclass_type):
+        object.__setattr__(obj, field.name, sample_value(hints.get(field.name), depth))
+    return obj
+
+
+def serializable_action_steps():
+    for name, step_type in sorted(MetaActionStep.action_steps.items()):
+        if issubclass(step_type, DataclassSerializable) and dataclasses.is_dataclass(step_type):
+            yield name, step_type
+
+
+def available_codecs():
+    for codec_type in codec.json_codecs + codec.binary_codecs:
+        if codec_type.available():
+            yield codec_type()
+
+
+def normalize(decoded):
+    # binary codecs do not convert dictionary keys to strings
+    return json.loads(json.dumps(decoded))
+
+
+class CodecCase(unittest.TestCase):
+
+    def assert_same_decoded(self, obj):
+        stdlib_codec = codec.JsonCodec()
+        expected = stdlib_codec.decode(obj._to_bytes(stdlib_codec))
+        for other_codec in available_codecs():
+            with self.subTest(codec=other_codec.name):
+                decoded = other_codec.decode(obj._to_bytes(other_codec))
+                self.assertEqual(normalize(decoded), expected)
+        return expected
+
+    def test_default_codec(self):
+        self.assertIsInstance(codec.set_json_codec(), codec.JsonCodec)
+        self.assertEqual(type(codec.get_json_codec()), codec.JsonCodec)
+        self.assertIs(codec.get_json_codec().encoder, codec.json_encoder)
+
+    def test_action_steps(self):
+        step_types = list(serializable_action_steps())
+        self.assertIn(action_steps.UpdateProgress.__name__, [name for name, _step_type in step_types])
+        for name, step_type in step_types:
+            with self.subTest(step=name):
+                self.assert_same_decoded(sample_instance(step_type))
+
+    def test_enums_use_hooks(self):
+        cell = DataCell(
+            row=1, column=2, flags=Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable,
+            roles={
+                Qt.ItemDataRole.DisplayRole: 'text',
+                Qt.ItemDataRole.ToolTipRole: QtGui.QKeySequence.StandardKey.Copy,
+                FocusPolicyRole: Qt.FocusPolicy.NoFocus,
+                PreviewRole: None,
+            }
+        )
+        decoded = self.assert_same_decoded(cell)
+        self.assertEqual(
+            decoded['roles'][str(Qt.ItemDataRole.ToolTipRole.value)],
+            QtGui.QKeySequence(QtGui.QKeySequence.StandardKey.Copy).toString()
+        )
+        self.assertEqual(
+            decoded['flags'],
+            (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable).value
+        )
+
+    def test_dates_are_refused(self):
+        cell = DataCell(roles={Qt.ItemDataRole.EditRole: datetime.date(2020, 1, 1)})
+        for any_codec in available_codecs():
+            with self.subTest(codec=any_codec.name):
+                with self.assertRaises(TypeError):
+                    cell._to_bytes(any_codec)
+
+    def test_keys(self):
+        data = {None: 1, True: 2, 3: 3, 4.5: 4, 'text': 5}
+        expected = json.loads(json.dumps(data))
+        for json_codec in available_codecs():
+            if json_codec.wire_format != 'json':
+                continue
+            with self.subTest(codec=json_codec.name):
+                self.assertEqual(json_codec.decode(json_codec.encode(data)), expected)
+
+
+class WireFormatHandler(object):
+
+    def __init__(self):
+        self.wire_format = 'json'
+        self.responses = []
+
+    def send_response(self, response):
+        self.responses.append((self.wire_format, response))
+
+
+class WireFormatCase(unittest.TestCase):
+
+    def test_wire_formats(self):
+        wire_formats = codec.get_wire_formats()
+        self.assertEqual(wire_formats[0], 'json')
+        for binary_codec in codec.binary_codecs:
+            self.assertEqual(binary_codec.wire_format in wire_formats, binary_codec.available())
+        with self.assertRaises(ValueError):
+            codec.get_codec('xml')
+
+    def test_set_wire_format(self):
+        for wire_format in codec.get_wire_formats()[1:]:
+            with self.subTest(wire_format=wire_format):
+                handler = WireFormatHandler()
+                SetWireFormat.execute({'wire_format': wire_format}, handler, handler)
+                self.assertEqual(handler.wire_format, wire_format)
+                # the confirmation is sent in the previous format
+                sent_format, response = handler.responses[0]
+                self.assertEqual(sent_format, 'json')
+                self.assertEqual(response.wire_format, wire_format)
+
+    def test_unavailable_wire_format(self):
+        handler = WireFormatHandler()
+        SetWireFormat.execute({'wire_format': 'xml'}, handler, handler)
+        self.assertEqual(handler.wire_format, 'json')
+        self.assertEqual(handler.responses[0][1].wire_format, 'json')
+
+    def test_decode_request(self):
+        request = ['SetFrameSize', {'frame_size': 1024}]
+        for wire_format in codec.get_wire_formats():
+            binary_codec = codec.get_codec(wire_format)
+            with self.subTest(wire_format=wire_format):
+                self.assertEqual(
+                    list(AbstractRequest.decode_request(binary_codec.encode(request), binary_codec)),
+                    request
+                )
+                # json requests are accepted in every wire format
+                self.assertEqual(
+                    list(AbstractRequest.decode_request(json.dumps(request).encode(), binary_codec)),
+                    request
+                )
+
+    def test_binary_keys(self):
+        data = {1: 'one', 'two': 2}
+        for wire_format in codec.get_wire_formats()[1:]:
+            binary_codec = codec.get_codec(wire_format)
+            with self.subTest(wire_format=wire_format):
+                self.assertEqual(binary_codec.decode(binary_codec.encode(data)), data)
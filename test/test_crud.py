@@ -0,0 +1,148 @@
+import json
+import unittest
+
+from camelot.core.qt import Qt
+from camelot.view.action_steps.crud import ColumnarUpdate
+from camelot.view.crud_action import (
+    ColumnarDataUpdate, ColumnarRows, CompactDataUpdate, DataCell,
+    DataRowHeader, DataUpdate,
+)
+
+display_role = Qt.ItemDataRole.DisplayRole.value
+tool_tip_role = Qt.ItemDataRole.ToolTipRole.value
+edit_role = Qt.ItemDataRole.EditRole.value
+flags = Qt.ItemFlag.ItemIsEnabled.value
+editable_flags = (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable).value
+
+# row 0 has only a change in column 1, row 1 has changes in columns 0 and 1,
+# only row 1 sets a tool tip
+changed_ranges = [
+    (0, DataRowHeader(row=0), [
+        DataCell(row=0, column=1, flags=flags, roles={display_role: 'b0'}),
+    ]),
+    (1, DataRowHeader(row=1), [
+        DataCell(row=1, column=0, flags=flags, roles={display_role: 'a1'}),
+        DataCell(row=1, column=1, flags=flags, roles={
+            display_role: 'b1', tool_tip_role: None,
+        }),
+    ]),
+]
+
+
+def cells_as_tuples(expanded):
+    return [
+        (header.row, [(cell.column, cell.flags, cell.roles) for cell in cells])
+        for header, cells in expanded
+    ]
+
+
+class ColumnarCase(unittest.TestCase):
+
+    def setUp(self):
+        columnar_rows = ColumnarRows.from_changed_ranges(changed_ranges, [0, 1])
+        self.update = ColumnarDataUpdate(columnar_rows)
+
+    def test_only_changed_cells(self):
+        self.assertEqual(cells_as_tuples(self.update.get_cells()), [
+            (0, [(1, flags, {display_role: 'b0'})]),
+            (1, [
+                (0, flags, {display_role: 'a1'}),
+                (1, flags, {display_role: 'b1', tool_tip_role: None}),
+            ]),
+        ])
+
+    def test_unset_on_the_wire(self):
+        update = json.loads(self.update._to_bytes())
+        self.assertEqual(update['flags'], [[None, flags], [flags, flags]])
+        # the tool tip of row 0 is absent, while the one of row 1 is None
+        self.assertEqual(update['unset'], [{}, {str(tool_tip_role): [0]}])
+        self.assertEqual(update['roles'][1][str(tool_tip_role)], [None, None])
+
+    def test_container_is_not_changed(self):
+        columnar_rows = ColumnarRows.from_changed_ranges(changed_ranges, [0, 1])
+        update = ColumnarDataUpdate(columnar_rows)
+        expected = cells_as_tuples(update.get_cells())
+        # reuse the container for the next update
+        columnar_rows.append_row(2, DataRowHeader(row=2))
+        columnar_rows.set_flags(0, flags)
+        columnar_rows.set_data(0, display_role, 'a2')
+        self.assertEqual(cells_as_tuples(update.get_cells()), expected)
+        next_update = ColumnarDataUpdate(columnar_rows)
+        self.assertEqual(
+            cells_as_tuples(next_update.get_cells()),
+            expected + [(2, [(0, flags, {display_role: 'a2'})])]
+        )
+
+    def test_action_step(self):
+        columnar_rows = ColumnarRows.from_changed_ranges(changed_ranges, [0, 1])
+        step = ColumnarUpdate(columnar_rows)
+        self.assertEqual(
+            cells_as_tuples(step.get_cells()),
+            cells_as_tuples(self.update.get_cells()),
+        )
+
+
+def table_ranges(rows, columns):
+    # changed ranges of a table where all cells share their flags and most
+    # roles, except for the display role and the flags of one row
+    return [
+        (row, DataRowHeader(row=row), [
+            DataCell(
+                row=row, column=column,
+                flags=(flags if row == 3 else editable_flags),
+                roles={
+                    display_role: '{} {}'.format(row, column),
+                    tool_tip_role: 'column {}'.format(column),
+                    edit_role: (True if row == 2 else 1),
+                }
+            ) for column in range(columns)
+        ]) for row in range(rows)
+    ]
+
+
+class CompactCase(unittest.TestCase):
+
+    def setUp(self):
+        self.changed_ranges = table_ranges(10, 5)
+        self.update = CompactDataUpdate(self.changed_ranges)
+
+    def test_cells_are_preserved(self):
+        expected = [
+            (row, [(cell.column, cell.flags, cell.roles) for cell in cells])
+            for row, _header, cells in self.changed_ranges
+        ]
+        self.assertEqual(cells_as_tuples(self.update.get_cells()), expected)
+        # distinguish True from 1
+        for header, cells in self.update.get_cells():
+            for cell in cells:
+                self.assertIs(type(cell.roles[edit_role]), bool if header.row == 2 else int)
+
+    def test_shared_roles_in_baseline(self):
+        self.assertEqual(len(self.update.baselines), 5)
+        for baseline in self.update.baselines:
+            self.assertEqual(baseline.flags, editable_flags)
+            self.assertEqual(
+                baseline.roles[tool_tip_role], 'column {}'.format(baseline.column)
+            )
+        for compact_row in self.update.rows:
+            for column, roles, *cell_flags in compact_row.cells:
+                self.assertNotIn(tool_tip_role, roles)
+                self.assertEqual(cell_flags, [flags] if compact_row.header.row == 3 else [])
+
+    def test_smaller_than_data_update(self):
+        self.assertLess(
+            len(self.update._to_bytes()),
+            len(DataUpdate(self.changed_ranges)._to_bytes())
+        )
+
+    def test_roles_missing_in_some_cells(self):
+        changed_ranges = [
+            (0, DataRowHeader(row=0), [DataCell(row=0, column=0, roles={display_role: 'a'})]),
+            (1, DataRowHeader(row=1), [DataCell(row=1, column=0, roles={tool_tip_role: 'b'})]),
+        ]
+        update = CompactDataUpdate(changed_ranges)
+        self.assertEqual(update.baselines[0].roles, {})
+        self.assertEqual(
+            [cells[0].roles for _header, cells in update.get_cells()],
+            [{display_role: 'a'}, {tool_tip_role: 'b'}]
+        )
@@ -0,0 +1,64 @@
+import io
+import os
+import tempfile
+import unittest
+
+from camelot.core.metrics import (
+    Histogram, HistogramExporter, PrometheusFileExporter, count_buckets,
+)
+
+
+class HistogramCase(unittest.TestCase):
+
+    def test_quantile(self):
+        histogram = Histogram(count_buckets)
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in [1] * 5 + [2] * 5:
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 1.0)
+        # interpolated within the bucket of the values between 1 and 2
+        self.assertEqual(histogram.quantile(0.75), 1.5)
+        self.assertEqual(histogram.quantile(1.0), 2.0)
+        self.assertEqual(histogram.mean, 1.5)
+        # values beyond the last bucket are estimated at its bound
+        histogram.observe(5000)
+        self.assertEqual(histogram.quantile(1.0), count_buckets[-1])
+
+
+class PrometheusCase(unittest.TestCase):
+
+    def setUp(self):
+        self.exporter = HistogramExporter()
+        self.exporter.observe('camelot_request_steps', ('InitiateAction', ('a', 'b')), 3)
+        self.exporter.observe('camelot_request_steps', ('InitiateAction', ('a', 'b')), 12)
+        self.exporter.observe('camelot_request_steps', ('Say "hi"', None), 1)
+
+    def test_exposition(self):
+        stream = io.StringIO()
+        self.exporter.write_prometheus(stream)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines.count('# TYPE camelot_request_steps histogram'), 1)
+        labels = 'request="InitiateAction",route="a/b"'
+        self.assertIn('camelot_request_steps_bucket{{{},le="2"}} 0'.format(labels), lines)
+        self.assertIn('camelot_request_steps_bucket{{{},le="5"}} 1'.format(labels), lines)
+        self.assertIn('camelot_request_steps_bucket{{{},le="10"}} 1'.format(labels), lines)
+        self.assertIn('camelot_request_steps_bucket{{{},le="20"}} 2'.format(labels), lines)
+        self.assertIn('camelot_request_steps_bucket{{{},le="+Inf"}} 2'.format(labels), lines)
+        self.assertIn('camelot_request_steps_sum{{{}}} 15'.format(labels), lines)
+        self.assertIn('camelot_request_steps_count{{{}}} 2'.format(labels), lines)
+        # label values are escaped, requests without a route have an empty one
+        self.assertIn(
+            'camelot_request_steps_count{request="Say \\"hi\\"",route=""} 1', lines
+        )
+
+    def test_dump(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'camelot.prom')
+            exporter = PrometheusFileExporter(path)
+            exporter.observe('camelot_response_bytes', ('Busy', None), 100)
+            exporter.dump()
+            stream = io.StringIO()
+            exporter.write_prometheus(stream)
+            with open(path) as dumped:
+                self.assertEqual(dumped.read(), stream.getvalue())
+            self.assertEqual(os.listdir(directory), ['camelot.prom'])
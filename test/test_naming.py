@@ -0,0 +1,505 @@
+import datetime
+import decimal
+import sys
+import threading
+import time
+import unittest
+
+from sqlalchemy import Column, Integer, String, create_engine, types
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
+
+from camelot.admin.action.application_action import model_context_naming
+from camelot.core import codec
+from camelot.core.metrics import HistogramExporter, metrics
+from camelot.core.naming import (
+    BindingType, EntityNamingContext, EvictedBindingException, EvictingNamingContext,
+    ImmutableBindingException,
+    InitialNamingContext, LeaseNamingContext, NameNotFoundException, NamingException,
+    TrustedName, initial_naming_context,
+)
+from camelot.view.action_steps.application import MainWindow
+
+from . import NamingContextMixin
+
+
+class ModelContext(object):
+    pass
+
+
+class ModelContextNamingCase(unittest.TestCase):
+
+    def tearDown(self):
+        model_context_naming.configure()
+
+    def test_main_window_not_evicted(self):
+        model_context = ModelContext()
+        main_window = MainWindow(
+            window_title='Main', exit_action=['exit'], model_context=model_context,
+        )
+        names = [
+            model_context_naming.bind('evictable_{}'.format(i), ModelContext())
+            for i in range(5)
+        ]
+        model_context_naming.configure(max_bindings=1, max_idle=0)
+        self.assertIs(
+            model_context_naming.resolve(main_window.model_context_name[-1]),
+            model_context,
+        )
+        for name in names:
+            with self.assertRaises(EvictedBindingException):
+                model_context_naming.resolve(name[-1])
+        # the model context of the window is still counted
+        statistics = model_context_naming.get_statistics()
+        self.assertGreaterEqual(statistics.strong_bindings, 1)
+        self.assertGreater(statistics.approximate_bytes, 0)
+
+
+class StatisticsCase(NamingContextMixin, unittest.TestCase):
+
+    def test_size_of_referred_objects(self):
+        model_context = ModelContext()
+        model_context.rows = [str(i) * 100 for i in range(1000)]
+        self.context.bind('model_context', model_context)
+        statistics = self.context.get_statistics()
+        self.assertEqual(statistics.strong_bindings, 1)
+        self.assertGreater(
+            statistics.approximate_bytes,
+            sum(sys.getsizeof(row) for row in model_context.rows)
+        )
+
+    def test_shared_objects_counted_once(self):
+        shared = ModelContext()
+        shared.rows = [str(i) * 100 for i in range(1000)]
+        self.context.bind('first', [shared])
+        first = self.context.get_statistics().approximate_bytes
+        self.context.bind('second', [shared])
+        second = self.context.get_statistics().approximate_bytes
+        self.assertLess(second - first, 1000)
+
+
+class Code(types.TypeDecorator):
+    """Column type of which the python type is unknown"""
+
+    impl = Integer
+
+
+def entity_base():
+    from vfinance.model.entity import EntityBase
+    return declarative_base(cls=EntityBase)
+
+
+class EntityNamingCase(unittest.TestCase):
+
+    def setUp(self):
+        Base = entity_base()
+        self.entities = {
+            key_name: type('Entity{}'.format(key_name.capitalize()), (Base,), {
+                '__tablename__': 'entity_{}'.format(key_name),
+                'id': Column(key_type, primary_key=True),
+            }) for key_name, key_type in (
+                ('integer', Integer), ('string', String), ('code', Code),
+            )
+        }
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.session = Session(engine)
+        for key_name, entity in self.entities.items():
+            keys = ['1', '2', '3'] if key_name == 'string' else [1, 2, 3]
+            self.session.add_all([entity(id=key) for key in keys])
+        self.session.commit()
+        self.context = initial_naming_context.resolve_context('entity')
+        for key_name, entity in self.entities.items():
+            self.context.bind_context(
+                'test_{}'.format(key_name), EntityNamingContext(entity)
+            )
+
+    def tearDown(self):
+        for key_name in self.entities:
+            self.context.unbind_context('test_{}'.format(key_name))
+        self.session.close()
+
+    def test_resolve_many_as_resolve(self):
+        session_key = str(self.session.hash_key)
+        for key_name in self.entities:
+            with self.subTest(key_type=key_name):
+                names = [
+                    ('entity', 'test_{}'.format(key_name), session_key, key)
+                    for key in ('3', '1', '3')
+                ]
+                self.session.expire_all()
+                self.assertEqual(
+                    initial_naming_context.resolve_many(names),
+                    [initial_naming_context.resolve(name) for name in names],
+                )
+                with self.assertRaises(NameNotFoundException):
+                    initial_naming_context.resolve_many(
+                        names + [('entity', 'test_{}'.format(key_name), session_key, '4')]
+                    )
+
+
+class ConcurrentResolveCase(NamingContextMixin, unittest.TestCase):
+
+    def test_resolve_while_writing(self):
+        objects = [ModelContext() for i in range(100)]
+        names = [tuple(self.context.bind(str(i), obj)) for i, obj in enumerate(objects)]
+        rebound = [ModelContext() for i in range(10)]
+        written = ModelContext()
+        stop = threading.Event()
+        errors = []
+
+        def read():
+            try:
+                while not stop.is_set():
+                    for i, name in enumerate(names):
+                        obj = initial_naming_context.resolve(name)
+                        if i == 0:
+                            assert (obj is objects[0]) or (obj in rebound)
+                        else:
+                            assert obj is objects[i]
+                    resolved = initial_naming_context.resolve_many(names[1:])
+                    assert resolved == objects[1:]
+                    try:
+                        assert initial_naming_context.resolve(
+                            self.context._name + ('written',)
+                        ) is written
+                    except NameNotFoundException:
+                        pass
+            except Exception as e:
+                errors.append(e)
+
+        def write():
+            for i in range(2000):
+                name = self.context.bind('written', written)
+                self.context.rebind('0', rebound[i % len(rebound)])
+                self.context.unbind(name[-1:])
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        write()
+        time.sleep(0.01)
+        stop.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual(errors, [])
+        self.assertIs(initial_naming_context.resolve(names[0]), rebound[1999 % len(rebound)])
+        with self.assertRaises(NameNotFoundException):
+            initial_naming_context.resolve(self.context._name + ('written',))
+
+
+class ResolveCacheCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.subcontext = self.context.bind_new_context('sub')
+
+    def test_resolved_names_are_cached(self):
+        obj = ModelContext()
+        name = tuple(self.subcontext.bind('obj', obj))
+        self.assertIs(initial_naming_context.resolve(name), obj)
+        self.assertIs(InitialNamingContext._resolved[name], obj)
+        self.assertEqual(initial_naming_context.resolve_many([name]), [obj])
+
+    def test_rebind_and_unbind_invalidate(self):
+        name = tuple(self.subcontext.bind('obj', ModelContext()))
+        initial_naming_context.resolve(name)
+        rebound = ModelContext()
+        self.subcontext.rebind('obj', rebound)
+        self.assertNotIn(name, InitialNamingContext._resolved)
+        self.assertIs(initial_naming_context.resolve(name), rebound)
+        self.subcontext.unbind('obj')
+        with self.assertRaises(NameNotFoundException):
+            initial_naming_context.resolve(name)
+
+    def test_unbind_context_invalidates(self):
+        names = [tuple(self.subcontext.bind(str(i), ModelContext())) for i in range(3)]
+        initial_naming_context.resolve_many(names)
+        self.context.unbind_context('sub')
+        for name in names:
+            self.assertNotIn(name, InitialNamingContext._resolved)
+            with self.assertRaises(NameNotFoundException):
+                initial_naming_context.resolve(name)
+
+    def test_generation(self):
+        # an object resolved before a binding changed is not cached
+        obj = ModelContext()
+        name = tuple(self.subcontext.bind('obj', obj))
+        generation = InitialNamingContext._generation
+        self.subcontext.rebind('obj', ModelContext())
+        self.assertGreater(InitialNamingContext._generation, generation)
+        InitialNamingContext._cache_resolved(name, obj, generation)
+        self.assertNotIn(name, InitialNamingContext._resolved)
+        self.assertIsNot(initial_naming_context.resolve(name), obj)
+
+    def test_weak_and_endpoint_bindings_not_cached(self):
+        obj = ModelContext()
+        transient = initial_naming_context.resolve_context('transient')
+        name = tuple(transient.bind('test_cache_{}'.format(id(self)), obj))
+        try:
+            self.assertIs(initial_naming_context.resolve(name), obj)
+            self.assertNotIn(name, InitialNamingContext._resolved)
+        finally:
+            transient.unbind(name[-1])
+        constant_name = ('constant', 'int', '5')
+        self.assertEqual(initial_naming_context.resolve(constant_name), 5)
+        self.assertNotIn(constant_name, InitialNamingContext._resolved)
+
+
+class TrustedNameCase(NamingContextMixin, unittest.TestCase):
+
+    def test_generated_names_are_trusted(self):
+        obj = ModelContext()
+        name = self.context.bind_new_context('sub').bind('obj', obj)
+        self.assertIs(type(name), TrustedName)
+        self.assertEqual(name, self.context._name + ('sub', 'obj'))
+        self.assertIs(initial_naming_context.resolve(name), obj)
+        self.assertIs(initial_naming_context.resolve(tuple(name)), obj)
+
+    def test_untrusted_names_are_validated(self):
+        for name in [self.context._name + ('',), self.context._name + (1,)]:
+            with self.subTest(name=name):
+                with self.assertRaises(NamingException):
+                    initial_naming_context.resolve(name)
+                # a trusted name is used as it is
+                trusted_name = TrustedName(name)
+                self.assertIs(initial_naming_context.get_composite_name(trusted_name), trusted_name)
+
+    def test_encoded_as_list(self):
+        name = TrustedName(('a', 'b'))
+        for any_codec in [codec.get_json_codec()] + [
+            codec.get_codec(wire_format) for wire_format in codec.get_wire_formats()[1:]
+        ]:
+            with self.subTest(codec=any_codec.name):
+                self.assertEqual(any_codec.decode(any_codec.encode(name)), ['a', 'b'])
+
+
+class BatchNamingCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.objects = [ModelContext() for i in range(4)]
+        self.names = [
+            self.context.bind('a', self.objects[0]),
+            self.context.bind_new_context('sub').bind('b', self.objects[1]),
+            self.context.resolve_context('sub').bind('c', self.objects[2]),
+            self.context.bind_new_context('other').bind('d', self.objects[3]),
+        ]
+
+    def test_resolve_many(self):
+        names = [
+            self.names[2], ('constant', 'int', '3'), self.names[0],
+            self.names[1], self.names[3], self.names[2],
+        ]
+        self.assertEqual(
+            initial_naming_context.resolve_many(names),
+            [initial_naming_context.resolve(name) for name in names],
+        )
+        self.assertEqual(
+            self.context.resolve_many([('sub', 'c'), 'a', ('other', 'd')]),
+            [self.objects[2], self.objects[0], self.objects[3]],
+        )
+        with self.assertRaises(NameNotFoundException):
+            initial_naming_context.resolve_many(self.names + [self.context._name + ('missing',)])
+
+    def test_unbind_many(self):
+        not_found = self.context.unbind_many([
+            'a', ('sub', 'b'), ('sub', 'missing'), ('missing', 'e'), ('other', 'd'),
+        ])
+        self.assertEqual(sorted(not_found), [('missing', 'e'), ('sub', 'missing')])
+        for name in (self.names[0], self.names[1], self.names[3]):
+            with self.assertRaises(NameNotFoundException):
+                initial_naming_context.resolve(name)
+        self.assertIs(initial_naming_context.resolve(self.names[2]), self.objects[2])
+        self.assertEqual(initial_naming_context.unbind_many([self.names[2]]), [])
+        with self.assertRaises(NameNotFoundException):
+            initial_naming_context.resolve(self.names[2])
+
+    def test_unbind_many_immutable(self):
+        self.context.bind('immutable', ModelContext(), immutable=True)
+        with self.assertRaises(ImmutableBindingException):
+            self.context.unbind_many(['immutable'])
+
+
+class ConstantsCase(unittest.TestCase):
+
+    values = [
+        (5, ('constant', 'int', '5')),
+        ('text', ('constant', 'str', 'text')),
+        (decimal.Decimal('1.50'), ('constant', 'decimal', '1.5')),
+        (datetime.date(2020, 2, 3), ('constant', 'date', '2020', '2', '3')),
+        (datetime.datetime(2020, 2, 3, 4, 5, 6), ('constant', 'datetime', '2020', '2', '3', '4', '5', '6')),
+        (True, ('constant', 'true')),
+        (None, ('constant', 'null')),
+    ]
+
+    def test_bind_and_resolve(self):
+        for value, name in self.values:
+            with self.subTest(value=value):
+                for i in range(2):
+                    self.assertEqual(initial_naming_context._bind_object(value), name)
+                    resolved = initial_naming_context.resolve(name)
+                    self.assertEqual(resolved, value)
+                    self.assertIs(type(resolved), type(value))
+
+    def test_equal_values_of_other_types(self):
+        # equal values of different types have their own names
+        for values in [
+            (1, True, decimal.Decimal(1)),
+            (0, False, decimal.Decimal(0)),
+        ]:
+            with self.subTest(values=values):
+                for value in values:
+                    initial_naming_context._bind_object(value)
+                names = [initial_naming_context._bind_object(value) for value in values]
+                self.assertEqual(len(set(names)), len(values))
+                for value, name in zip(values, names):
+                    self.assertIs(type(initial_naming_context.resolve(name)), type(value))
+
+    def test_aware_datetimes(self):
+        value = datetime.datetime(2020, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc)
+        self.assertEqual(
+            initial_naming_context._bind_object(value),
+            ('constant', 'datetime', '2020', '2', '3', '4', '5', '6'),
+        )
+
+    def test_invalid_names(self):
+        for name in [('constant', 'int', 'a'), ('constant', 'int', ['5']), ('constant', 'date', '2020')]:
+            with self.subTest(name=name):
+                with self.assertRaises(NamingException):
+                    initial_naming_context.resolve(name)
+
+
+class LeaseCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.leases = LeaseNamingContext()
+        self.context.bind_context('leases', self.leases)
+
+    def tearDown(self):
+        self.leases.configure()
+        super().tearDown()
+
+    def test_expiry(self):
+        bound_before = self.leases.bind('before', ModelContext())
+        self.leases.configure(ttl=0.05)
+        bound_after = self.leases.bind('after', ModelContext())
+        self.assertEqual(self.leases.expire(), 0)
+        time.sleep(0.1)
+        self.assertEqual(self.leases.expire(), 2)
+        for name in (bound_before, bound_after):
+            with self.assertRaises(NameNotFoundException):
+                initial_naming_context.resolve(name)
+        self.assertEqual(len(self.leases._leases), 0)
+        self.assertEqual(self.leases._retained_bytes, 0)
+
+    def test_oldest_lease_released(self):
+        self.leases.configure(max_leases=2)
+        names = [self.leases.bind(str(i), ModelContext()) for i in range(3)]
+        with self.assertRaises(NameNotFoundException):
+            initial_naming_context.resolve(names[0])
+        for name in names[1:]:
+            initial_naming_context.resolve(name)
+        self.leases.configure(max_leases=1)
+        with self.assertRaises(NameNotFoundException):
+            initial_naming_context.resolve(names[1])
+        initial_naming_context.resolve(names[2])
+
+    def test_unbind_releases(self):
+        names = [self.leases.bind(str(i), [ModelContext()]) for i in range(3)]
+        self.leases.rebind('0', [ModelContext()])
+        self.assertEqual(len(self.leases._leases), 3)
+        initial_naming_context.unbind(names[0])
+        initial_naming_context.unbind_many(names[1:])
+        self.assertEqual(len(self.leases._leases), 0)
+        self.assertEqual(self.leases._retained_bytes, 0)
+
+    def test_only_direct_bindings_are_leases(self):
+        self.leases.configure(max_leases=1)
+        subcontext = self.leases.bind_new_context('sub')
+        names = [subcontext.bind(str(i), ModelContext()) for i in range(3)]
+        self.assertEqual(len(self.leases._leases), 0)
+        for name in names:
+            initial_naming_context.resolve(name)
+
+    def test_metrics(self):
+        exporter = HistogramExporter()
+        metrics.add_exporter(exporter)
+        try:
+            self.leases.bind('0', ModelContext())
+            self.leases.bind('1', ModelContext())
+        finally:
+            metrics.remove_exporter(exporter)
+        histograms = exporter.histograms()
+        leases = histograms[('camelot_leases', ('', None))]
+        self.assertEqual(leases.count, 2)
+        self.assertEqual(leases.sum, 3)
+        self.assertGreater(histograms[('camelot_leases_retained_bytes', ('', None))].sum, 0)
+
+
+class EvictionCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.evicting = EvictingNamingContext()
+        self.context.bind_context('evicting', self.evicting)
+
+    def tearDown(self):
+        self.evicting.configure()
+        super().tearDown()
+
+    def test_least_recently_used_evicted(self):
+        self.evicting.configure(max_bindings=2)
+        self.evicting.bind('0', ModelContext())
+        self.evicting.bind('1', ModelContext())
+        # using '0' makes '1' the least recently used binding
+        self.evicting.resolve('0')
+        self.evicting.bind('2', ModelContext())
+        with self.assertRaises(EvictedBindingException):
+            self.evicting.resolve('1')
+        self.evicting.resolve('0')
+        self.evicting.resolve('2')
+        with self.assertRaises(NameNotFoundException) as cm:
+            self.evicting.resolve('3')
+        self.assertNotIsInstance(cm.exception, EvictedBindingException)
+
+    def test_idle_bindings_evicted(self):
+        self.evicting.bind('idle', ModelContext())
+        self.evicting.bind('immutable', ModelContext(), immutable=True)
+        time.sleep(0.05)
+        self.evicting.bind('used', ModelContext())
+        self.evicting.configure(max_idle=0.04)
+        with self.assertRaises(EvictedBindingException):
+            self.evicting.resolve('idle')
+        self.evicting.resolve('used')
+        self.evicting.resolve('immutable')
+
+    def test_idle_binding_evicted_when_resolved(self):
+        self.evicting.configure(max_idle=0.04)
+        self.evicting.bind('idle', ModelContext())
+        self.evicting.bind('immutable', ModelContext(), immutable=True)
+        time.sleep(0.05)
+        with self.assertRaises(EvictedBindingException):
+            self.evicting.resolve('idle')
+        self.evicting.resolve('immutable')
+
+    def test_idle_binding_evicted_without_use(self):
+        self.evicting.configure(max_idle=0.04)
+        self.evicting.bind('idle', ModelContext())
+        storage = self.evicting._bindings[BindingType.named_object]
+        # no bindings are added or resolved while waiting for the eviction
+        deadline = time.monotonic() + 5
+        while ('idle' in storage) and (time.monotonic() < deadline):
+            time.sleep(0.05)
+        self.assertNotIn('idle', storage)
+
+    def test_rebind_evicted_name(self):
+        self.evicting.configure(max_bindings=1)
+        self.evicting.bind('0', ModelContext())
+        self.evicting.bind('1', ModelContext())
+        obj = ModelContext()
+        self.evicting.bind('0', obj)
+        self.assertIs(self.evicting.resolve('0'), obj)
+        with self.assertRaises(EvictedBindingException):
+            self.evicting.resolve('1')
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+import unittest
+
+from camelot.core.backend import PythonConnection
+from camelot.core.conf import settings
+from camelot.core.profiler import model_profiler
+from camelot.view.action_steps import StartProfiler, StopProfiler
+
+from . import NamingContextMixin
+from .test_requests import ResponseHandler, initiate_action
+
+
+class ProfileSettings(object):
+
+    def __init__(self, profile_dir):
+        self.CAMELOT_PROFILE_DIR = profile_dir
+
+
+def sampled_work(seconds):
+    started = time.monotonic()
+    while time.monotonic() - started < seconds:
+        pass
+
+
+class ProfiledAction(object):
+
+    def model_run(self, model_context, mode):
+        yield StartProfiler()
+        sampled_work(0.2)
+        yield StopProfiler()
+
+
+class ProfilerStepsCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings = ProfileSettings(self.directory.name)
+        settings.insert(0, self.settings)
+        self.action_name = tuple(self.context.bind('action', ProfiledAction()))
+        self.model_context = tuple(self.context.bind('model_context', object()))
+
+    def tearDown(self):
+        model_profiler.stop()
+        settings.remove(self.settings)
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_steps_are_data(self):
+        StartProfiler()
+        self.assertFalse(model_profiler.running)
+        StopProfiler()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_profile_with_yielded_steps(self):
+        response_handler = ResponseHandler()
+        PythonConnection._execute_request(
+            *initiate_action(self.action_name, self.model_context, 1), response_handler
+        )
+        self.assertTrue(model_profiler.running)
+        run_name = response_handler.responses[1].run_name
+        # the client acknowledges the blocking profiler steps
+        for i in range(2):
+            PythonConnection._execute_request('SendActionResponse', {
+                'run_name': list(run_name), 'response': None,
+            }, response_handler)
+        self.assertFalse(model_profiler.running)
+        (file_name,) = os.listdir(self.directory.name)
+        with open(os.path.join(self.directory.name, file_name)) as stream:
+            stacks = stream.read()
+        self.assertIn('SendActionResponse {}'.format('/'.join(self.action_name)), stacks)
+        self.assertIn('sampled_work', stacks)
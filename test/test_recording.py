@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import unittest
+
+from camelot.core.codec import get_json_codec
+from camelot.core.naming import initial_naming_context
+from camelot.core.recording import Recorder, StubResponseHandler, replay
+from camelot.view.action_steps import UpdateProgress
+from camelot.view.requests import AbstractRequest
+
+from . import NamingContextMixin
+from .test_requests import initiate_action
+
+
+class GreetingAction(object):
+    """
+    Action that asks a name and greets it
+    """
+
+    def model_run(self, model_context, mode):
+        name = yield UpdateProgress(text='Name ?', blocking=True)
+        yield UpdateProgress(text='Hello {}'.format(name))
+
+
+class DecodingResponseHandler(StubResponseHandler):
+    """
+    Response handler that keeps the decoded responses, and records them
+    when it has a recorder.
+    """
+
+    def __init__(self, recorder=None):
+        super().__init__()
+        self.recorder = recorder
+        self.decoded = []
+
+    def send_response(self, response):
+        super().send_response(response)
+        data = response._to_bytes(get_json_codec())
+        self.decoded.append(json.loads(data))
+        if self.recorder is not None:
+            self.recorder.record_response(data)
+
+
+def rename_run(response, run_name):
+    response_type_name, response_data = response
+    if response_data.get('run_name', ['constant', 'null']) != ['constant', 'null']:
+        response_data = dict(response_data, run_name=list(run_name))
+    return [response_type_name, response_data]
+
+
+class ReplayCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.action_name = tuple(self.context.bind('action', GreetingAction()))
+        self.model_context = tuple(self.context.bind('model_context', object()))
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'recording.jsonl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def handle(self, request, response_handler):
+        data = json.dumps(request).encode()
+        response_handler.recorder.record_request(data)
+        AbstractRequest.handle_request(data, response_handler, response_handler)
+
+    def test_replay(self):
+        recorder = Recorder(self.path)
+        recording = DecodingResponseHandler(recorder)
+        self.handle(initiate_action(self.action_name, self.model_context, 1), recording)
+        recorded_run_name = recording.run_names[('gui', 1)]
+        # keep the recorded run, so the replayed run gets another name
+        recorded_run = initial_naming_context.resolve(recorded_run_name)
+        self.handle(['SendActionResponse', {
+            'run_name': list(recorded_run_name), 'response': 'World',
+        }], recording)
+        recorder.close()
+        replaying = DecodingResponseHandler()
+        replayed = replay(self.path, replaying)
+        self.assertEqual(
+            [request.request_type for request in replayed],
+            ['InitiateAction', 'SendActionResponse']
+        )
+        # the response was sent to the replayed run
+        replayed_run_name = replaying.run_names[('gui', 1)]
+        self.assertNotEqual(replayed_run_name, recorded_run_name)
+        self.assertIsNot(recorded_run, None)
+        self.assertEqual(
+            replaying.decoded,
+            [rename_run(response, replayed_run_name) for response in recording.decoded]
+        )
+        self.assertIn('Hello World', json.dumps(replaying.decoded))
+        self.assertEqual(replaying.responses, recording.responses)
@@ -0,0 +1,382 @@
+import json
+import threading
+import unittest
+from unittest import mock
+
+from camelot.core.backend import PythonConnection
+from camelot.core.metrics import HistogramExporter, metrics
+from camelot.core.scheduler import Lane, Scheduler
+from camelot.view.action_steps import UpdateProgress
+from camelot.view.requests import (
+    AbstractRequest, Batch, CancelAction, ModelRun, action_lanes,
+    cancel_requests, model_run_names,
+)
+from camelot.view.responses import ActionStepped, ActionStopped, BatchResponse, Busy
+
+from . import NamingContextMixin
+
+
+class RecordingAction(object):
+    """
+    Action that records the thread in which it runs, and optionally waits
+    for an event before finishing.
+    """
+
+    def __init__(self):
+        self.threads = []
+
+    def model_run(self, model_context, mode):
+        self.threads.append(threading.current_thread().name)
+        return
+        yield
+
+
+class ResponseHandler(object):
+
+    wire_format = 'json'
+    frame_size = None
+    busy_threshold = None
+
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler
+        self.responses = []
+
+    def send_response(self, response):
+        self.responses.append(response)
+
+    def has_cancel_request(self, run_name):
+        return False
+
+
+def initiate_action(action_name, model_context, gui_run_name):
+    return ['InitiateAction', {
+        'gui_run_name': ['gui', gui_run_name],
+        'action_name': list(action_name),
+        'model_context': list(model_context),
+        'mode': None,
+    }]
+
+
+class ExportAction(object):
+    """
+    Action that runs in the bulk lane until an event is set, or a number of
+    steps is reached.
+    """
+
+    def __init__(self, event, steps=500):
+        self.started = threading.Event()
+        self.event = event
+        self.steps = steps
+        self.event_set_while_running = None
+
+    def model_run(self, model_context, mode):
+        self.started.set()
+        for i in range(self.steps):
+            if self.event.wait(0.01):
+                break
+            yield None
+        self.event_set_while_running = self.event.is_set()
+
+
+class RowDataAction(RecordingAction):
+
+    def __init__(self):
+        super().__init__()
+        self.completed = threading.Event()
+
+    def model_run(self, model_context, mode):
+        yield from super().model_run(model_context, mode)
+        self.completed.set()
+
+
+class BatchCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.action = RecordingAction()
+        self.action_name = tuple(self.context.bind('action', self.action))
+        self.model_contexts = [
+            tuple(self.context.bind(name, object())) for name in ('a', 'b')
+        ]
+
+    def test_strand_of_requests(self):
+        request_data = {'requests': [
+            initiate_action(self.action_name, self.model_contexts[0], 1),
+            ['Unbind', {'names': []}],
+            initiate_action(self.action_name, self.model_contexts[0], 2),
+        ]}
+        self.assertEqual(
+            Batch.get_strand(request_data),
+            ('model_context',) + self.model_contexts[0]
+        )
+        self.assertEqual(Batch.split(request_data), [request_data])
+        self.assertEqual(Batch.get_strand({'requests': [['Unbind', {'names': []}]]}), None)
+
+    def test_split_requests_on_different_strands(self):
+        request_data = {'requests': [
+            initiate_action(self.action_name, self.model_contexts[0], 1),
+            ['Unbind', {'names': []}],
+            initiate_action(self.action_name, self.model_contexts[1], 2),
+            initiate_action(self.action_name, self.model_contexts[0], 3),
+        ]}
+        self.assertEqual(Batch.get_strand(request_data), None)
+        parts = Batch.split(request_data)
+        self.assertEqual(len(parts), 2)
+        self.assertEqual(
+            [request[1]['gui_run_name'][1] for request in parts[0]['requests'] if request[0] == 'InitiateAction'],
+            [1, 3]
+        )
+        self.assertEqual(parts[0]['requests'][1][0], 'Unbind')
+        self.assertEqual(
+            [Batch.get_strand(part) for part in parts],
+            [('model_context',) + model_context for model_context in self.model_contexts]
+        )
+
+    def test_lane_of_requests(self):
+        bulk = {'requests': [initiate_action(self.action_name, self.model_contexts[0], 1)]}
+        self.assertEqual(Batch.get_lane(bulk), Lane.bulk)
+        interactive = {'requests': [
+            initiate_action(self.action_name, self.model_contexts[0], 1),
+            initiate_action(('crud_action', 'row_data'), self.model_contexts[0], 2),
+        ]}
+        self.assertEqual(Batch.get_lane(interactive), Lane.interactive)
+
+    def test_batched_actions_run_on_their_strand(self):
+        scheduler = Scheduler(2)
+        response_handler = ResponseHandler(scheduler)
+        batch = ['Batch', {'requests': [
+            initiate_action(self.action_name, self.model_contexts[0], 1),
+            initiate_action(self.action_name, self.model_contexts[1], 2),
+        ]}]
+        PythonConnection._execute_serialized_request(
+            json.dumps(batch).encode(), response_handler
+        )
+        scheduler.shutdown()
+        self.assertEqual(len(self.action.threads), 2)
+        for thread_name in self.action.threads:
+            self.assertTrue(thread_name.startswith('camelot-model'))
+        # a batch response for each part
+        response_types = [type(response).__name__ for response in response_handler.responses]
+        self.assertEqual(response_types.count('BatchResponse'), 2)
+
+
+class ProgressAction(object):
+    """
+    Action that reports its progress, after waiting for an event when given.
+    """
+
+    def __init__(self, event=None):
+        self.event = event
+        self.event_set_while_running = None
+
+    def model_run(self, model_context, mode):
+        if self.event is not None:
+            self.event_set_while_running = self.event.wait(5)
+        for i in range(3):
+            yield UpdateProgress(i, 3)
+
+
+class BusyResponseHandler(ResponseHandler):
+    """
+    Response handler that sets an event when it is informed the model is busy
+    """
+
+    def __init__(self, busy_threshold):
+        super().__init__()
+        self.busy_threshold = busy_threshold
+        self.busy = threading.Event()
+
+    def send_response(self, response):
+        super().send_response(response)
+        if isinstance(response, Busy) and response.busy:
+            self.busy.set()
+
+
+class LabelledResponseHandler(ResponseHandler):
+    """
+    Response handler that records the metric labels with which each response
+    is sent.
+    """
+
+    busy_threshold = 60
+
+    def send_response(self, response):
+        self.responses.append((response, getattr(metrics._local, 'labels', None)))
+
+
+class ResponseBufferCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.action_name = tuple(self.context.bind('action', RecordingAction()))
+        self.model_context = tuple(self.context.bind('model_context', object()))
+        self.exporter = HistogramExporter()
+        metrics.add_exporter(self.exporter)
+
+    def tearDown(self):
+        metrics.remove_exporter(self.exporter)
+        super().tearDown()
+
+    def test_under_threshold(self):
+        action_name = tuple(self.context.bind('progress', ProgressAction()))
+        response_handler = BusyResponseHandler(60)
+        PythonConnection._execute_request(
+            *initiate_action(action_name, self.model_context, 1), response_handler
+        )
+        # no busy messages and a single message with all responses
+        self.assertEqual(len(response_handler.responses), 1)
+        self.assertIsInstance(response_handler.responses[0], BatchResponse)
+        self.assertFalse(response_handler.busy.is_set())
+
+    def test_over_threshold(self):
+        response_handler = BusyResponseHandler(0.05)
+        action = ProgressAction(response_handler.busy)
+        action_name = tuple(self.context.bind('progress', action))
+        PythonConnection._execute_request(
+            *initiate_action(action_name, self.model_context, 1), response_handler
+        )
+        # busy is sent while the action is running, before any response
+        self.assertTrue(action.event_set_while_running)
+        responses = response_handler.responses
+        self.assertEqual(responses[0], Busy(True))
+        self.assertEqual(responses[-1], Busy(False))
+        self.assertNotIn(Busy(True), responses[1:])
+
+    def test_flush_with_labels(self):
+        response_handler = LabelledResponseHandler()
+        request_type_name, request_data = initiate_action(
+            self.action_name, self.model_context, 1
+        )
+        PythonConnection._execute_request(
+            request_type_name, request_data, response_handler
+        )
+        self.assertEqual(len(response_handler.responses), 1)
+        response, labels = response_handler.responses[0]
+        self.assertEqual(labels, ('InitiateAction', self.action_name))
+
+
+class PreemptionCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.row_data_action = RowDataAction()
+        self.export_action = ExportAction(self.row_data_action.completed)
+        self.export_name = tuple(self.context.bind('export', self.export_action))
+        self.row_data_name = tuple(self.context.bind('row_data', self.row_data_action))
+        action_lanes[self.row_data_name] = Lane.interactive
+        self.model_context = tuple(self.context.bind('model_context', object()))
+
+    def tearDown(self):
+        del action_lanes[self.row_data_name]
+        super().tearDown()
+
+    def test_row_data_during_export(self):
+        scheduler = Scheduler(2)
+        response_handler = ResponseHandler(scheduler)
+        export = initiate_action(self.export_name, self.model_context, 1)
+        PythonConnection._execute_serialized_request(
+            json.dumps(export).encode(), response_handler
+        )
+        self.assertTrue(self.export_action.started.wait(5))
+        row_data = initiate_action(self.row_data_name, self.model_context, 2)
+        PythonConnection._execute_serialized_request(
+            json.dumps(row_data).encode(), response_handler
+        )
+        scheduler.shutdown()
+        self.assertEqual(len(self.row_data_action.threads), 1)
+        self.assertTrue(self.export_action.event_set_while_running)
+
+
+class CancelResponseHandler(ResponseHandler):
+    """
+    Response handler that consumes the registered cancel requests
+    """
+
+    def has_cancel_request(self, run_name):
+        return cancel_requests.pop(run_name)
+
+    def run_name(self):
+        for response in self.responses:
+            if isinstance(response, ActionStepped):
+                return tuple(response.run_name)
+
+
+class CancelCase(NamingContextMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.export_action = ExportAction(threading.Event())
+        self.export_name = tuple(self.context.bind('export', self.export_action))
+        self.action_name = tuple(self.context.bind('action', RecordingAction()))
+        self.model_context = tuple(self.context.bind('model_context', object()))
+        self.response_handler = CancelResponseHandler()
+
+    def cancel(self, run_name):
+        CancelAction.execute(
+            {'run_name': list(run_name)}, self.response_handler, self.response_handler
+        )
+
+    def test_registry(self):
+        run_name = ('model_run', 'test')
+        self.assertFalse(cancel_requests.pop(run_name))
+        cancel_requests.request(run_name)
+        self.assertTrue(cancel_requests.pop(run_name))
+        self.assertFalse(cancel_requests.pop(run_name))
+
+    def test_cancel_while_stepping(self):
+        export = threading.Thread(
+            target=PythonConnection._execute_request,
+            args=(*initiate_action(self.export_name, self.model_context, 1), self.response_handler)
+        )
+        export.start()
+        self.assertTrue(self.export_action.started.wait(5))
+        run_name = self.response_handler.run_name()
+        self.cancel(run_name)
+        export.join(5)
+        self.assertFalse(export.is_alive())
+        # the export was interrupted at its next step
+        self.assertIsNone(self.export_action.event_set_while_running)
+        self.assertIsInstance(self.response_handler.responses[-2], ActionStopped)
+        self.assertFalse(cancel_requests.pop(run_name))
+
+    def test_cancel_finished_run(self):
+        PythonConnection._execute_request(
+            *initiate_action(self.action_name, self.model_context, 1), self.response_handler
+        )
+        run_name = self.response_handler.run_name()
+        responses = len(self.response_handler.responses)
+        self.cancel(run_name)
+        self.assertEqual(len(self.response_handler.responses), responses)
+        self.assertFalse(cancel_requests.pop(run_name))
+
+    def test_cancel_while_stopping(self):
+        run = ModelRun(('gui', 1), self.export_action.model_run(None, None), None)
+        run_name = model_run_names.bind(str(id(run)), run)
+        # the run is iterated by another thread, that holds its lock
+        locked, release = threading.Event(), threading.Event()
+
+        def iterate():
+            with run.lock:
+                locked.set()
+                release.wait(5)
+
+        iterating = threading.Thread(target=iterate)
+        iterating.start()
+        self.assertTrue(locked.wait(5))
+        request = cancel_requests.request
+
+        def stop_and_request(run_name):
+            # the run stops after the cancel resolved it, but before the
+            # cancel is registered
+            AbstractRequest._stop_action(
+                run_name, run.gui_run_name, self.response_handler, StopIteration()
+            )
+            request(run_name)
+
+        try:
+            with mock.patch.object(cancel_requests, 'request', stop_and_request):
+                self.cancel(run_name)
+        finally:
+            release.set()
+            iterating.join()
+        self.assertFalse(cancel_requests.pop(run_name))
@@ -0,0 +1,43 @@
+import copy
+import dataclasses
+import pickle
+import unittest
+
+from camelot.admin.action.base import Mode, State
+from camelot.admin.admin_route import RouteWithRenderHint
+from camelot.admin.icon import CompletionValue
+from camelot.core.qt import Qt
+from camelot.view.crud_action import DataCell, DataRowHeader
+
+from . import unslotted
+from .test_codec import sample_instance
+
+slotted_classes = [
+    CompletionValue, RouteWithRenderHint, Mode, State, DataCell, DataRowHeader,
+]
+
+
+class SlotsCase(unittest.TestCase):
+
+    def test_no_instance_dictionary(self):
+        for cls in slotted_classes:
+            with self.subTest(cls=cls.__name__):
+                self.assertFalse(hasattr(sample_instance(cls), '__dict__'))
+
+    def test_same_serialization(self):
+        for cls in slotted_classes:
+            with self.subTest(cls=cls.__name__):
+                obj = sample_instance(cls)
+                unslotted_obj = unslotted(cls)(**{
+                    f.name: getattr(obj, f.name) for f in dataclasses.fields(cls)
+                })
+                self.assertEqual(obj._to_dict(), unslotted_obj._to_dict())
+
+    def test_copy(self):
+        cell = DataCell(row=1, column=2, roles={Qt.ItemDataRole.DisplayRole: 'text'})
+        for duplicate in (
+            copy.copy(cell), copy.deepcopy(cell), pickle.loads(pickle.dumps(cell)),
+            dataclasses.replace(cell),
+        ):
+            self.assertEqual(duplicate, cell)
+            self.assertIsNot(duplicate, cell)